@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import tempfile
+import urllib.request
+import click
+from flask import current_app, url_for
+from app.compression import precompress_static
+
+SOURCE_DIR = 'src'
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Bundles built from static/src: logical name -> source under static/
+BUNDLES = {
+    'app.css': f'{SOURCE_DIR}/app.css',
+    'app.js': f'{SOURCE_DIR}/app.js',
+}
+
+# Third-party files vendored into static/vendor by `flask assets-vendor`.
+# Until they have been fetched, static_asset() falls back to these URLs.
+VENDOR_FILES = {
+    'vendor/inter-latin-wght-normal.woff2':
+        'https://cdn.jsdelivr.net/npm/@fontsource-variable/inter@5.0.16/files/inter-latin-wght-normal.woff2',
+    'vendor/quill.min.js': 'https://cdn.jsdelivr.net/npm/quill@1.3.7/dist/quill.min.js',
+    'vendor/quill.snow.css': 'https://cdn.jsdelivr.net/npm/quill@1.3.7/dist/quill.snow.css',
+    'vendor/signature_pad.umd.min.js':
+        'https://cdn.jsdelivr.net/npm/signature_pad@4.1.7/dist/signature_pad.umd.min.js',
+    'vendor/qrcode.min.js': 'https://cdnjs.cloudflare.com/ajax/libs/qrcodejs/1.0.0/qrcode.min.js',
+}
+
+# Needed by every page: announced with Link: rel=preload on HTML responses
+PRELOAD = (
+    ('app.css', 'style'),
+    ('app.js', 'script'),
+    ('vendor/inter-latin-wght-normal.woff2', 'font'),
+)
+
+_VENDOR_URL = re.compile(r"url\((['\"]?)\.\./(vendor/[^'\")]+)\1\)")
+
+
+def _manifest():
+    return current_app.extensions.get('asset_manifest', {})
+
+
+def assets_built():
+    """True once `flask assets-build` has produced the bundles."""
+    return 'app.css' in _manifest()
+
+
+def static_asset(name):
+    """URL for a bundle or vendored file, preferring its fingerprinted build.
+
+    Falls back to the unbuilt source under static/, and for vendored files that
+    have not been fetched yet to their upstream CDN URL.
+    """
+    manifest = _manifest()
+    if name in manifest:
+        return url_for('static', filename=manifest[name])
+    if name in BUNDLES:
+        return url_for('static', filename=BUNDLES[name])
+    if name in VENDOR_FILES and not os.path.exists(os.path.join(current_app.static_folder, name)):
+        return VENDOR_FILES[name]
+    return url_for('static', filename=name)
+
+
+def load_manifest(app):
+    path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    app.extensions['asset_manifest'] = manifest
+    return manifest
+
+
+def _preload_header(app, manifest):
+    links = []
+    for name, kind in PRELOAD:
+        if name not in manifest:
+            continue
+        link = f'<{app.static_url_path}/{manifest[name]}>; rel=preload; as={kind}'
+        if kind == 'font':
+            link += '; type="font/woff2"; crossorigin'
+        links.append(link)
+    return ', '.join(links)
+
+
+def init_assets(app):
+    manifest = load_manifest(app)
+    preload = _preload_header(app, manifest)
+    app.jinja_env.globals['static_asset'] = static_asset
+    app.jinja_env.globals['assets_built'] = assets_built
+
+    if preload:
+        @app.after_request
+        def add_preload_links(response):
+            if response.mimetype == 'text/html' and response.status_code == 200:
+                response.headers.add('Link', preload)
+            return response
+
+
+def _fingerprint(source, dist, name):
+    """Copy source into dist as <stem>.<hash><ext> and return its path relative to static/."""
+    with open(source, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    stem, ext = os.path.splitext(os.path.basename(name))
+    filename = f'{stem}.{digest}{ext}'
+    with open(os.path.join(dist, filename), 'wb') as f:
+        f.write(content)
+    return f'{DIST_DIR}/{filename}'
+
+
+def _run(command, *args):
+    argv = shlex.split(command) + list(args)
+    try:
+        subprocess.run(argv, check=True, cwd=current_app.root_path)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        raise click.ClickException(f'{argv[0]} failed: {exc}')
+
+
+def build_assets(minify=True):
+    """Build fingerprinted bundles into static/dist and write the manifest.
+
+    Vendored files are fingerprinted as they are; app.css is compiled by the
+    Tailwind CLI (purged to the classes used in templates and scripts) and
+    app.js is minified with esbuild. Files from earlier builds are removed.
+    """
+    static = current_app.static_folder
+    dist = os.path.join(static, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+
+    for name in VENDOR_FILES:
+        source = os.path.join(static, name)
+        if os.path.exists(source):
+            manifest[name] = _fingerprint(source, dist, name)
+
+    minify_flag = ['--minify'] if minify else []
+    with tempfile.TemporaryDirectory() as tmp:
+        css_path = os.path.join(tmp, 'app.css')
+        _run(
+            current_app.config['TAILWIND_CLI'],
+            '-c', os.path.join(static, SOURCE_DIR, 'tailwind.config.js'),
+            '-i', os.path.join(static, BUNDLES['app.css']),
+            '-o', css_path,
+            *minify_flag
+        )
+        with open(css_path) as f:
+            css = f.read()
+        # The bundle lives next to the fingerprinted vendor files, not under src/
+        css = _VENDOR_URL.sub(
+            lambda m: f"url({os.path.basename(manifest[m.group(2)])})" if m.group(2) in manifest else m.group(0),
+            css
+        )
+        with open(css_path, 'w') as f:
+            f.write(css)
+        manifest['app.css'] = _fingerprint(css_path, dist, 'app.css')
+
+        js_path = os.path.join(tmp, 'app.js')
+        _run(
+            current_app.config['ESBUILD_CLI'],
+            os.path.join(static, BUNDLES['app.js']),
+            f'--outfile={js_path}',
+            *minify_flag
+        )
+        manifest['app.js'] = _fingerprint(js_path, dist, 'app.js')
+
+    current = {os.path.basename(path) for path in manifest.values()} | {MANIFEST_NAME}
+    for filename in os.listdir(dist):
+        if filename not in current:
+            os.remove(os.path.join(dist, filename))
+
+    manifest_path = os.path.join(dist, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+
+def vendor_assets(force=False):
+    """Download VENDOR_FILES into static/vendor; returns the names fetched."""
+    fetched = []
+    for name, url in VENDOR_FILES.items():
+        target = os.path.join(current_app.static_folder, name)
+        if os.path.exists(target) and not force:
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            content = response.read()
+        with open(target + '.tmp', 'wb') as f:
+            f.write(content)
+        os.replace(target + '.tmp', target)
+        fetched.append(name)
+    return fetched
+
+
+def register_asset_commands(app):
+    @app.cli.command('assets-vendor')
+    @click.option('--force', is_flag=True, help='Download again even if already present.')
+    def assets_vendor(force):
+        """Fetch third-party fonts and scripts into static/vendor."""
+        for name in vendor_assets(force):
+            click.echo(f'Fetched {name}')
+        click.echo('Vendored assets up to date.')
+
+    @app.cli.command('assets-build')
+    @click.option('--no-minify', is_flag=True, help='Keep bundles readable (for debugging).')
+    def assets_build(no_minify):
+        """Build fingerprinted CSS/JS bundles into static/dist, with .gz/.br variants."""
+        manifest = build_assets(minify=not no_minify)
+        for name, path in sorted(manifest.items()):
+            click.echo(f'{name} -> {path}')
+        precompress_static(current_app.static_folder)
+        click.echo('Restart the app to pick up the new manifest.')
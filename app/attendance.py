@@ -0,0 +1,181 @@
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import click
+from flask import current_app
+from sqlalchemy import bindparam, exists, inspect, literal, select, text, union_all
+from models import db, AttendanceLog
+from app.dialect import dialect_insert
+
+_UNIQUE_INDEX = 'uq_attendance_user_course_day'
+# Single-column indexes superseded by the (user_id, course_id, attendance_date) index
+_OBSOLETE_INDEXES = ('ix_attendance_log_user_id', 'ix_attendance_log_timestamp')
+
+
+
+@lru_cache(maxsize=None)
+def _zone(name):
+    try:
+        return ZoneInfo(name)
+    except ZoneInfoNotFoundError:
+        # No system zoneinfo and no tzdata package (e.g. a bare Windows venv)
+        logging.getLogger(__name__).warning('Time zone %r not found; attendance days use UTC. Install tzdata.', name)
+        return timezone.utc
+
+
+def _local_zone(app=None):
+    return _zone((app or current_app).config.get('ATTENDANCE_TIMEZONE', 'UTC'))
+
+
+def attendance_day(moment=None, app=None):
+    """Local calendar day for a naive UTC timestamp (now when omitted)."""
+    moment = moment or datetime.utcnow()
+    return moment.replace(tzinfo=timezone.utc).astimezone(_local_zone(app)).date()
+
+
+def has_attended(user_id, course_id, day=None):
+    """Whether the user checked in to the course on the given local day (today by default)."""
+    return db.session.query(AttendanceLog.id).filter_by(
+        user_id=user_id,
+        course_id=course_id,
+        attendance_date=day or attendance_day()
+    ).first() is not None
+
+
+def insert_attendance(rows):
+    """INSERT for attendance rows that skips any user, course and day already recorded.
+
+    Uses ON CONFLICT against the unique per-day index. Until duplicates left
+    from before that index are cleaned up (`flask attendance-dedupe`) the
+    index cannot exist, and rows are inserted only where no row matches.
+    """
+    table = AttendanceLog.__table__
+    if current_app.extensions.get('attendance_unique_day', True):
+        return dialect_insert(table).values(rows).on_conflict_do_nothing(
+            index_elements=['user_id', 'course_id', 'attendance_date']
+        )
+    names = ('user_id', 'course_id', 'timestamp', 'attendance_date', 'status')
+    new = union_all(*[
+        select(*[literal(row[name], table.c[name].type).label(name) for name in names]) for row in rows
+    ]).subquery('new_attendance')
+    recorded = exists().where(
+        table.c.user_id == new.c.user_id,
+        table.c.course_id.is_not_distinct_from(new.c.course_id),
+        table.c.attendance_date == new.c.attendance_date,
+    )
+    return table.insert().from_select(names, select(*[new.c[name] for name in names]).where(~recorded))
+
+
+def mark_attendance(user_id, course_id, status='present'):
+    """Record today's check-in; a second check-in on the same day is ignored.
+
+    Returns True if a new row was written. The caller commits.
+    """
+    now = datetime.utcnow()
+    stmt = insert_attendance([{
+        'user_id': user_id,
+        'course_id': course_id,
+        'timestamp': now,
+        'attendance_date': attendance_day(now),
+        'status': status,
+    }])
+    return db.session.execute(stmt).rowcount == 1
+
+
+# Every row but the earliest of each user, course and day
+_DUPLICATES = ('FROM attendance_log WHERE id NOT IN ('
+               'SELECT MIN(id) FROM attendance_log GROUP BY user_id, course_id, attendance_date)')
+
+
+def _duplicate_count(connection):
+    return connection.execute(text(f'SELECT COUNT(*) {_DUPLICATES}')).scalar()
+
+
+def _enforce_unique_day(connection, index_names):
+    connection.execute(text(
+        f'CREATE UNIQUE INDEX {_UNIQUE_INDEX} ON attendance_log (user_id, course_id, attendance_date)'
+    ))
+    for name in _OBSOLETE_INDEXES:
+        if name in index_names:
+            connection.execute(text(f'DROP INDEX {name}'))
+
+
+def _index_names(connection):
+    inspector = inspect(connection)
+    index_names = {index['name'] for index in inspector.get_indexes('attendance_log')}
+    index_names.update(c['name'] for c in inspector.get_unique_constraints('attendance_log'))
+    return index_names
+
+
+def _migrate(connection, app):
+    """Add and backfill attendance_date on databases created before it existed.
+
+    Returns whether the unique per-day index is in place. It is not created
+    while duplicate days exist; those are only reported, never deleted here.
+    """
+    inspector = inspect(connection)
+    if not inspector.has_table('attendance_log'):
+        return True
+    columns = {column['name'] for column in inspector.get_columns('attendance_log')}
+    if 'attendance_date' not in columns:
+        connection.execute(text('ALTER TABLE attendance_log ADD COLUMN attendance_date DATE'))
+
+    table = AttendanceLog.__table__
+    rows = connection.execute(
+        db.select(table.c.id, table.c.timestamp).where(table.c.attendance_date.is_(None))
+    ).all()
+    if rows:
+        connection.execute(
+            table.update().where(table.c.id == bindparam('row_id')).values(attendance_date=bindparam('day')),
+            [{'row_id': row_id, 'day': attendance_day(timestamp, app)} for row_id, timestamp in rows]
+        )
+
+    index_names = _index_names(connection)
+    if _UNIQUE_INDEX in index_names:
+        return True
+    duplicates = _duplicate_count(connection)
+    if duplicates:
+        app.logger.warning(
+            'attendance_log has %d duplicate check-in(s) for the same user, course and day; '
+            'run `flask attendance-dedupe` to review and `--delete` to remove them.', duplicates
+        )
+        return False
+    _enforce_unique_day(connection, index_names)
+    return True
+
+
+def init_attendance(app):
+    """Bring an existing attendance_log table up to the per-day schema."""
+    with app.app_context():
+        with db.engine.begin() as connection:
+            app.extensions['attendance_unique_day'] = _migrate(connection, app)
+
+
+def register_attendance_commands(app):
+    @app.cli.command('attendance-dedupe')
+    @click.option('--delete', is_flag=True, help='Delete all but the earliest check-in of each day and add the unique index.')
+    def attendance_dedupe(delete):
+        """Report check-ins recorded more than once for the same user, course and day."""
+        with db.engine.begin() as connection:
+            duplicates = _duplicate_count(connection)
+            groups = connection.execute(text(
+                'SELECT user_id, course_id, attendance_date, COUNT(*) FROM attendance_log '
+                'GROUP BY user_id, course_id, attendance_date HAVING COUNT(*) > 1'
+            )).all()
+            for user_id, course_id, day, count in groups:
+                click.echo(f'user={user_id} course={course_id} day={day}: {count} rows')
+            index_names = _index_names(connection)
+            if not duplicates:
+                if _UNIQUE_INDEX not in index_names:
+                    _enforce_unique_day(connection, index_names)
+                    click.echo('No duplicates; added the unique per-day index.')
+                else:
+                    click.echo('No duplicates.')
+                return
+            if not delete:
+                click.echo(f'{duplicates} duplicate row(s); run with --delete to keep only the earliest of each day.')
+                return
+            connection.execute(text(f'DELETE {_DUPLICATES}'))
+            _enforce_unique_day(connection, index_names)
+            click.echo(f'Deleted {duplicates} duplicate row(s) and added the unique per-day index. Restart the app workers.')
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from threading import RLock
+import time
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with optional per-entry expiry.
+
+    Each worker process holds its own copy, so anything stored here must be
+    safe to serve slightly stale or be keyed by a version the caller checks.
+    """
+
+    def __init__(self, max_entries=1024, default_ttl=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing/expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting the least recently used entry if full."""
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Drop a single key if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
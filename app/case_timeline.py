@@ -0,0 +1,94 @@
+from collections import defaultdict
+from models import db, PatientCaseDailyUpdate
+from app.cache import MemoryCache
+
+# case_id -> (version, nodes, last_update_date)
+_timeline_cache = MemoryCache(max_entries=4096)
+
+
+def _case_version(case):
+    """Version stamp for a case; any write to the case or its updates bumps updated_at."""
+    return (case.updated_at, case.status, case.end_date)
+
+
+def _build_nodes(case, updates):
+    """Build the Day-N tree nodes for one case from its ascending updates."""
+    nodes = [{
+        'label': 'Day 1',
+        'date': case.start_date,
+        'status': 'Start',
+        'summary': case.initial_diagnosis or case.initial_notes
+    }]
+
+    for entry_date, status, summary in updates:
+        day_number = (entry_date - case.start_date).days + 1
+        nodes.append({
+            'label': f'Day {day_number}',
+            'date': entry_date,
+            'status': status or 'Update',
+            'summary': summary
+        })
+
+    if case.status == 'closed':
+        closed_date = case.end_date or (updates[-1][0] if updates else case.updated_at.date())
+        nodes.append({
+            'label': 'Done',
+            'date': closed_date,
+            'status': 'Closed',
+            'summary': None
+        })
+
+    return nodes
+
+
+def build_case_timelines(cases):
+    """Return (case_tree_map, last_update_map) for the given patient cases.
+
+    Cached timelines are reused when the case version still matches; every
+    other case is built from a single query over all of their daily updates.
+    """
+    case_tree_map = {}
+    last_update_map = {}
+    stale_cases = []
+
+    for case in cases:
+        cached = _timeline_cache.get(case.id)
+        if cached is not None and cached[0] == _case_version(case):
+            case_tree_map[case.id] = cached[1]
+            last_update_map[case.id] = cached[2]
+        else:
+            stale_cases.append(case)
+
+    if not stale_cases:
+        return case_tree_map, last_update_map
+
+    rows = db.session.query(
+        PatientCaseDailyUpdate.case_id,
+        PatientCaseDailyUpdate.entry_date,
+        PatientCaseDailyUpdate.status,
+        PatientCaseDailyUpdate.update_summary
+    ).filter(
+        PatientCaseDailyUpdate.case_id.in_([c.id for c in stale_cases])
+    ).order_by(
+        PatientCaseDailyUpdate.case_id,
+        PatientCaseDailyUpdate.entry_date.asc()
+    ).all()
+
+    updates_by_case = defaultdict(list)
+    for case_id, entry_date, status, summary in rows:
+        updates_by_case[case_id].append((entry_date, status, summary))
+
+    for case in stale_cases:
+        updates = updates_by_case.get(case.id, [])
+        nodes = _build_nodes(case, updates)
+        last_update = updates[-1][0] if updates else None
+        _timeline_cache.set(case.id, (_case_version(case), nodes, last_update))
+        case_tree_map[case.id] = nodes
+        last_update_map[case.id] = last_update
+
+    return case_tree_map, last_update_map
+
+
+def invalidate_case_timeline(case_id):
+    """Drop the cached timeline for a case after its updates or status change."""
+    _timeline_cache.delete(case_id)
@@ -0,0 +1,191 @@
+import atexit
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from models import db
+from app.attendance import attendance_day, insert_attendance
+from app.sqlite import write_slot
+
+# Multi-row INSERT size; 5 bound parameters per row stays far below SQLite's limit
+_FLUSH_BATCH = 500
+
+
+def _window(now=None, period=None):
+    period = period or current_app.config.get('CHECKIN_TOKEN_PERIOD', 30)
+    return int((now if now is not None else time.time()) // period)
+
+
+def _signature(course_id, window):
+    key = current_app.config['SECRET_KEY'].encode()
+    digest = hmac.new(key, f'checkin:{course_id}:{window}'.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:12]).decode()
+
+
+def make_checkin_token(course_id, now=None):
+    """Token for the course's current check-in window, shown as a QR code."""
+    window = _window(now)
+    return f'{window}.{_signature(course_id, window)}'
+
+
+def verify_checkin_token(course_id, token, now=None):
+    """Check a token without touching the database.
+
+    The current and the previous window are accepted, so a code scanned just
+    before it rotates still works.
+    """
+    window, _, signature = (token or '').partition('.')
+    try:
+        window = int(window)
+    except ValueError:
+        return False
+    current = _window(now)
+    if window not in (current, current - 1):
+        return False
+    return hmac.compare_digest(signature, _signature(course_id, window))
+
+
+class CheckinBuffer:
+    """Accepted check-ins waiting to be written to AttendanceLog.
+
+    A background thread drains the buffer every CHECKIN_FLUSH_INTERVAL
+    seconds with multi-row INSERT ... ON CONFLICT DO NOTHING statements, so a
+    burst of check-ins costs a handful of commits instead of one per request.
+    When a batch fails its rows are retried one by one, so a single bad row
+    cannot hold back the rest; a row that has failed CHECKIN_MAX_ATTEMPTS
+    times is logged and dropped, and the thread backs off while flushes
+    keep failing. Check-ins still buffered when the process is killed are
+    lost; a normal interpreter exit flushes them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = []
+        self._seen = set()
+        self._attempts = {}
+        self._failing = 0
+        self._thread = None
+        self._app = None
+
+    def add(self, user_id, course_id, status='present'):
+        now = datetime.utcnow()
+        day = attendance_day(now)
+        key = (user_id, course_id, day)
+        with self._lock:
+            if key not in self._seen:
+                self._seen.add(key)
+                self._rows.append({
+                    'user_id': user_id,
+                    'course_id': course_id,
+                    'timestamp': now,
+                    'attendance_date': day,
+                    'status': status,
+                })
+            if self._thread is None:
+                self._start(current_app._get_current_object())
+
+    def contains(self, user_id, course_id, day=None):
+        """Whether a check-in for the user's course and day is buffered or being written."""
+        with self._lock:
+            return (user_id, course_id, day or attendance_day()) in self._seen
+
+    def _start(self, app):
+        self._app = app
+        self._thread = threading.Thread(target=self._run, name='checkin-flush', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        interval = self._app.config.get('CHECKIN_FLUSH_INTERVAL', 0.25)
+        while True:
+            # Exponential backoff, capped at 30 s, while flushes keep failing
+            time.sleep(min(interval * 2 ** self._failing, 30))
+            try:
+                self.flush()
+            except Exception:
+                self._app.logger.exception('Flushing buffered check-ins failed')
+
+    def _drain(self):
+        # Keys stay in _seen until the batch commits, so contains() holds while it is written
+        with self._lock:
+            rows, self._rows = self._rows, []
+        return rows
+
+    @staticmethod
+    def _key(row):
+        return row['user_id'], row['course_id'], row['attendance_date']
+
+    def _forget(self, rows):
+        with self._lock:
+            for row in rows:
+                key = self._key(row)
+                self._seen.discard(key)
+                self._attempts.pop(key, None)
+
+    def _requeue(self, rows):
+        """Put failed rows back at the front, dropping those out of attempts."""
+        max_attempts = self._app.config.get('CHECKIN_MAX_ATTEMPTS', 5)
+        dropped = []
+        with self._lock:
+            retry = []
+            for row in rows:
+                key = self._key(row)
+                self._attempts[key] = self._attempts.get(key, 0) + 1
+                if self._attempts[key] >= max_attempts:
+                    dropped.append(row)
+                else:
+                    # Their keys never left _seen, so add() cannot have queued them again meanwhile
+                    retry.append(row)
+            self._rows[:0] = retry
+        for row in dropped:
+            self._app.logger.error('Dropping check-in after %d failed attempts: user=%s course=%s day=%s',
+                                   max_attempts, *self._key(row))
+        self._forget(dropped)
+
+    def _write(self, rows):
+        with write_slot(), db.engine.begin() as connection:
+            for start in range(0, len(rows), _FLUSH_BATCH):
+                connection.execute(insert_attendance(rows[start:start + _FLUSH_BATCH]))
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written."""
+        if self._app is None:
+            return 0
+        rows = self._drain()
+        if not rows:
+            self._failing = 0
+            return 0
+        with self._app.app_context():
+            try:
+                self._write(rows)
+            except Exception:
+                self._app.logger.exception('Writing %d buffered check-in(s) failed', len(rows))
+            else:
+                self._forget(rows)
+                self._failing = 0
+                return len(rows)
+
+            # Retry one by one so a bad row cannot hold back the rest of the batch
+            written, failed = [], []
+            if len(rows) == 1:
+                failed = rows
+            else:
+                for row in rows:
+                    try:
+                        self._write([row])
+                    except Exception:
+                        failed.append(row)
+                    else:
+                        written.append(row)
+        self._forget(written)
+        if failed:
+            self._app.logger.error('%d buffered check-in(s) could not be written', len(failed))
+            self._requeue(failed)
+        self._failing = self._failing + 1 if failed else 0
+        return len(written)
+
+
+checkin_buffer = CheckinBuffer()
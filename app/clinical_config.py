@@ -0,0 +1,191 @@
+from threading import Lock
+from types import MappingProxyType
+import json
+import time
+from flask import current_app
+from models import db, ClinicalConfig
+
+DEFAULT_DOCUMENTS = [
+    {'type': 'referral', 'label': 'Referral Letter', 'requires_expiration': True},
+    {'type': 'health', 'label': 'Health Letter', 'requires_expiration': True},
+    {'type': 'insurance', 'label': 'Insurance', 'requires_expiration': True},
+    {'type': 'integrity_pact', 'label': 'Integrity Pact', 'requires_expiration': False}
+]
+
+DEFAULT_AGREEMENTS = [
+    {'type': 'confidentiality', 'title': 'Confidentiality', 'text': 'I hereby agree to maintain strict patient confidentiality and comply with all data protection regulations...'},
+    {'type': 'ethics', 'title': 'Ethics', 'text': 'I commit to upholding the highest standards of professional ethics in all clinical interactions...'},
+    {'type': 'discipline', 'title': 'Discipline', 'text': 'I acknowledge and accept the disciplinary policies and sanctions outlined by the hospital...'},
+    {'type': 'emergency', 'title': 'Emergency Procedures', 'text': 'I understand the emergency procedures and agree to follow all safety protocols...'}
+]
+
+DEFAULT_PRETEST_QUESTIONS = [
+    {
+        'id': 1,
+        'question': 'Which action is most important before touching a patient?',
+        'options': ['Hand hygiene', 'Adjust bed', 'Write notes', 'Check phone'],
+        'correct_option': 'Hand hygiene'
+    },
+    {
+        'id': 2,
+        'question': 'What should you do if your ID badge is missing?',
+        'options': ['Report to supervisor', 'Borrow a friend’s badge', 'Ignore it', 'Leave the unit'],
+        'correct_option': 'Report to supervisor'
+    },
+    {
+        'id': 3,
+        'question': 'Which item is part of basic PPE?',
+        'options': ['Gloves', 'Necklace', 'Perfume', 'Watch'],
+        'correct_option': 'Gloves'
+    }
+]
+
+DEFAULT_POSTTEST_QUESTIONS = [
+    {
+        'id': 1,
+        'question': 'When should you perform hand hygiene?',
+        'options': ['Before and after patient contact', 'Only after meals', 'Only at shift end', 'Once per day'],
+        'correct_option': 'Before and after patient contact'
+    },
+    {
+        'id': 2,
+        'question': 'Which is the correct way to dispose of sharps?',
+        'options': ['Place in a sharps container', 'Throw in regular trash', 'Leave on tray', 'Wrap in tissue'],
+        'correct_option': 'Place in a sharps container'
+    },
+    {
+        'id': 3,
+        'question': 'If you witness a safety incident, what is the first step?',
+        'options': ['Ensure patient safety', 'Post on chat', 'Finish other tasks', 'Ignore it'],
+        'correct_option': 'Ensure patient safety'
+    }
+]
+
+
+def build_default_config():
+    """Return a new ClinicalConfig row populated with the default clinical settings."""
+    return ClinicalConfig(
+        documents_json=json.dumps(DEFAULT_DOCUMENTS),
+        agreements_json=json.dumps(DEFAULT_AGREEMENTS),
+        required_course_ids_json=json.dumps([]),
+        pretest_questions_json=json.dumps(DEFAULT_PRETEST_QUESTIONS),
+        posttest_questions_json=json.dumps(DEFAULT_POSTTEST_QUESTIONS)
+    )
+
+
+def _answer_key(questions):
+    """Map question id (as submitted by the form) to its correct option."""
+    key = {}
+    for q in questions:
+        correct = q.get('correct_option') or q.get('answer') or q.get('correct')
+        if correct:
+            key[str(q.get('id'))] = correct
+    return MappingProxyType(key)
+
+
+class ClinicalConfigSnapshot:
+    """Immutable, pre-parsed view of the ClinicalConfig row.
+
+    Supports the dict-style access the routes already use
+    (snapshot['documents']) alongside attribute access. The nested
+    dicts are shared between requests and must not be mutated.
+    """
+
+    __slots__ = ('version', 'config_id', 'documents', 'agreements', 'required_course_ids',
+                 'pretest_questions', 'posttest_questions', 'required_doc_types',
+                 'required_agreement_types', 'agreement_texts', 'agreement_titles', 'answer_keys')
+
+    def __init__(self, config):
+        documents = tuple(json.loads(config.documents_json or '[]'))
+        agreements = tuple(json.loads(config.agreements_json or '[]'))
+        pretest_questions = tuple(json.loads(config.pretest_questions_json or '[]'))
+        posttest_questions = tuple(json.loads(config.posttest_questions_json or '[]'))
+
+        values = {
+            'version': (config.id, config.updated_at),
+            'config_id': config.id,
+            'documents': documents,
+            'agreements': agreements,
+            'required_course_ids': tuple(json.loads(config.required_course_ids_json or '[]')),
+            'pretest_questions': pretest_questions,
+            'posttest_questions': posttest_questions,
+            'required_doc_types': frozenset(d['type'] for d in documents),
+            'required_agreement_types': frozenset(a['type'] for a in agreements),
+            'agreement_texts': MappingProxyType({a['type']: a.get('text', '') for a in agreements}),
+            'agreement_titles': MappingProxyType({
+                a['type']: a.get('title', a['type'].replace('_', ' ').title()) for a in agreements
+            }),
+            'answer_keys': MappingProxyType({
+                'pretest': _answer_key(pretest_questions),
+                'posttest': _answer_key(posttest_questions),
+            }),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ClinicalConfigSnapshot is read-only')
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name)
+
+    def questions_for(self, assessment_type):
+        """Return the configured questions for 'pretest' or 'posttest'."""
+        if assessment_type == 'pretest':
+            return self.pretest_questions
+        return self.posttest_questions
+
+
+_lock = Lock()
+_snapshot = None
+_checked_at = 0.0
+
+
+def get_clinical_config_row():
+    """Return the ClinicalConfig row for editing, creating the defaults if missing."""
+    config = ClinicalConfig.query.first()
+    if not config:
+        config = build_default_config()
+        db.session.add(config)
+        db.session.commit()
+    return config
+
+
+def _current_version():
+    row = db.session.query(ClinicalConfig.id, ClinicalConfig.updated_at).order_by(ClinicalConfig.id).first()
+    return tuple(row) if row else None
+
+
+def get_clinical_config():
+    """Return the cached ClinicalConfigSnapshot.
+
+    Within CLINICAL_CONFIG_CHECK_INTERVAL seconds the snapshot is served with no
+    database access. After that, only (id, updated_at) is read; the JSON blobs are
+    re-read and parsed only when another worker has saved a newer version.
+    """
+    global _snapshot, _checked_at
+
+    interval = current_app.config.get('CLINICAL_CONFIG_CHECK_INTERVAL', 5)
+    now = time.monotonic()
+    snapshot = _snapshot
+    if snapshot is not None and now - _checked_at < interval:
+        return snapshot
+
+    with _lock:
+        if _snapshot is not None and now - _checked_at < interval:
+            return _snapshot
+        if _snapshot is None or _current_version() != _snapshot.version:
+            _snapshot = ClinicalConfigSnapshot(get_clinical_config_row())
+        _checked_at = now
+        return _snapshot
+
+
+def invalidate_clinical_config():
+    """Drop this worker's snapshot so the next call reloads it immediately."""
+    global _snapshot, _checked_at
+    with _lock:
+        _snapshot = None
+        _checked_at = 0.0
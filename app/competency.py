@@ -0,0 +1,195 @@
+from collections import defaultdict
+from datetime import datetime
+import click
+from sqlalchemy import and_, case, func, or_
+from models import db, CompetencyChecklist, CompetencyProgress, LogbookEntry, StudentProfile
+from app.dialect import dialect_insert
+
+# Logbook role -> CompetencyProgress counter it increments
+ROLE_COUNTERS = {
+    'observe': 'observations_count',
+    'assist': 'assists_count',
+    'independent': 'independent_count',
+}
+
+# CompetencyProgress counter -> CompetencyChecklist minimum it is measured against
+COUNTER_MINIMUMS = {
+    'observations_count': 'minimum_observations',
+    'assists_count': 'minimum_assists',
+    'independent_count': 'minimum_independent',
+}
+
+
+def _normalize(name):
+    return ' '.join((name or '').split()).lower()
+
+
+def _meets(counts, competency):
+    return all(counts[counter] >= (getattr(competency, minimum) or 0)
+               for counter, minimum in COUNTER_MINIMUMS.items())
+
+
+def _checklist_index(program=None):
+    """Checklist rows keyed by (program, normalized name); the first row wins on duplicates."""
+    checklists = CompetencyChecklist.query
+    if program:
+        checklists = checklists.filter(CompetencyChecklist.program == program)
+    competencies = {}
+    for c in checklists.order_by(CompetencyChecklist.id):
+        competencies.setdefault((c.program, _normalize(c.competency_name)), c)
+    return competencies
+
+
+def find_competency(program, procedure_name):
+    """Return the checklist row for a program's procedure, ignoring case and spacing.
+
+    Matched in Python with the same normalization as recompute_competency_progress.
+    """
+    return _checklist_index(program).get((program, _normalize(procedure_name)))
+
+
+def apply_logbook_entry(profile, procedure_name, role):
+    """Count a logbook entry towards the student's competency progress.
+
+    Runs a single INSERT ... ON CONFLICT DO UPDATE that increments the
+    counter in the database, so concurrent entries never lose increments.
+    The level is raised from 'not_yet' to 'competent' in the same statement
+    once every minimum is met. The caller commits.
+    """
+    counter = ROLE_COUNTERS.get(role)
+    if counter is None:
+        return
+    competency = find_competency(profile.program, procedure_name)
+    if competency is None:
+        return
+
+    table = CompetencyProgress.__table__
+    now = datetime.utcnow()
+    counts = {name: 0 for name in COUNTER_MINIMUMS}
+    counts[counter] = 1
+
+    stmt = dialect_insert(table).values(
+        student_id=profile.id,
+        competency_id=competency.id,
+        competency_level='competent' if _meets(counts, competency) else 'not_yet',
+        updated_at=now,
+        **counts
+    )
+    new_counts = {name: table.c[name] + stmt.excluded[name] for name in COUNTER_MINIMUMS}
+    reached = and_(*[
+        new_counts[name] >= (getattr(competency, minimum) or 0)
+        for name, minimum in COUNTER_MINIMUMS.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['student_id', 'competency_id'],
+        set_={
+            **new_counts,
+            'competency_level': case(
+                (and_(table.c.competency_level == 'not_yet', reached), 'competent'),
+                else_=table.c.competency_level
+            ),
+            'updated_at': now,
+        }
+    )
+    db.session.execute(stmt)
+
+
+def recompute_competency_progress(program=None, cohort=None):
+    """Rebuild CompetencyProgress from LogbookEntry for a program and/or cohort.
+
+    Counts come from one GROUP BY over (student_id, procedure_name, role) and are
+    written back with a bulk upsert. Levels are re-evaluated against the current
+    checklist minimums: students who now meet them become 'competent' (an existing
+    'competent' or 'advanced' level is kept), students who no longer meet them drop
+    back to 'not_yet' unless a supervisor signed the competency off. Returns the
+    number of progress rows written. The caller commits.
+    """
+    students = db.session.query(StudentProfile.id, StudentProfile.program)
+    if program:
+        students = students.filter(StudentProfile.program == program)
+    if cohort:
+        students = students.filter(StudentProfile.cohort == cohort)
+    student_programs = dict(students.all())
+    if not student_programs:
+        return 0
+
+    competencies = _checklist_index(program)
+
+    totals = defaultdict(lambda: {name: 0 for name in COUNTER_MINIMUMS})
+
+    # Keep existing rows in scope so progress with no remaining entries is zeroed
+    existing = db.session.query(CompetencyProgress.student_id, CompetencyProgress.competency_id).filter(
+        CompetencyProgress.student_id.in_(student_programs.keys())
+    )
+    for key in existing:
+        totals[tuple(key)]
+
+    grouped = db.session.query(
+        LogbookEntry.student_id,
+        LogbookEntry.procedure_name,
+        LogbookEntry.role,
+        func.count(LogbookEntry.id)
+    ).filter(
+        LogbookEntry.student_id.in_(student_programs.keys()),
+        LogbookEntry.role.in_(ROLE_COUNTERS.keys())
+    ).group_by(LogbookEntry.student_id, LogbookEntry.procedure_name, LogbookEntry.role)
+
+    for student_id, procedure_name, role, count in grouped:
+        competency = competencies.get((student_programs[student_id], _normalize(procedure_name)))
+        if competency is not None:
+            totals[(student_id, competency.id)][ROLE_COUNTERS[role]] += count
+
+    if not totals:
+        return 0
+
+    checklist_by_id = {c.id: c for c in competencies.values()}
+    missing_ids = {competency_id for _, competency_id in totals} - checklist_by_id.keys()
+    if missing_ids:
+        for c in CompetencyChecklist.query.filter(CompetencyChecklist.id.in_(missing_ids)):
+            checklist_by_id[c.id] = c
+
+    now = datetime.utcnow()
+    rows = []
+    for (student_id, competency_id), counts in totals.items():
+        competency = checklist_by_id.get(competency_id)
+        met = competency is not None and _meets(counts, competency)
+        rows.append({
+            'student_id': student_id,
+            'competency_id': competency_id,
+            'competency_level': 'competent' if met else 'not_yet',
+            'updated_at': now,
+            **counts
+        })
+
+    table = CompetencyProgress.__table__
+    stmt = dialect_insert(table)
+    current = table.c.competency_level
+    # Plain comparisons rather than IN (...), which cannot be used with executemany
+    at_least_competent = or_(current == 'competent', current == 'advanced')
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['student_id', 'competency_id'],
+        set_={
+            **{name: stmt.excluded[name] for name in COUNTER_MINIMUMS},
+            'competency_level': case(
+                (and_(stmt.excluded.competency_level == 'competent', at_least_competent), current),
+                (stmt.excluded.competency_level == 'competent', 'competent'),
+                (table.c.supervisor_signoff.is_(True), current),
+                (at_least_competent, 'not_yet'),
+                else_=current
+            ),
+            'updated_at': now,
+        }
+    )
+    db.session.execute(stmt, rows)
+    return len(rows)
+
+
+def register_competency_commands(app):
+    @app.cli.command('competency-recompute')
+    @click.option('--program', default=None, help='Only students in this program.')
+    @click.option('--cohort', default=None, help='Only students in this cohort.')
+    def competency_recompute(program, cohort):
+        """Rebuild competency progress from logbook entries."""
+        written = recompute_competency_progress(program=program, cohort=cohort)
+        db.session.commit()
+        click.echo(f'Recomputed {written} competency progress rows.')
@@ -0,0 +1,196 @@
+import gzip
+import os
+import zlib
+import click
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/xml', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+}
+
+# Extensions under static/ that get precompressed siblings
+PRECOMPRESS_EXTENSIONS = {'.css', '.js', '.json', '.svg', '.html', '.txt', '.xml', '.map'}
+PRECOMPRESSED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def available_encodings():
+    """Encodings this process can produce, in order of preference."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+def negotiate_encoding(accept, offered):
+    """Pick the client's highest-q encoding among offered (ties go to offered order).
+
+    accept is a parsed Accept-Encoding header; returns None for identity.
+    """
+    best, best_quality = None, 0
+    for encoding in offered:
+        quality = accept.quality(encoding) if accept else 0
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Compressor:
+    """Incremental compressor with a common interface over gzip, brotli and zstd."""
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == 'zstd':
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == 'br':
+            self._obj = brotli.Compressor(quality=level)
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        if self.encoding == 'br':
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self):
+        """Emit everything buffered so far, keeping the stream open."""
+        if self.encoding == 'zstd':
+            return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == 'br':
+            return self._obj.flush()
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'zstd':
+            return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+        if self.encoding == 'br':
+            return self._obj.finish()
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+def _compress_stream(chunks, compressor):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if chunk:
+                # Flush per chunk so streamed pages still render progressively
+                yield compressor.compress(chunk) + compressor.flush()
+        yield compressor.finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def init_compression(app):
+    """Compress dynamic responses according to the negotiated Accept-Encoding.
+
+    Register before any other after_request hook: hooks run in reverse order,
+    so this one then sees the final body and headers. File responses
+    (send_file) and anything already encoded are left alone; static files
+    are served precompressed by the WSGI fast path instead.
+    """
+    levels = {
+        'zstd': app.config.get('COMPRESS_ZSTD_LEVEL', 3),
+        'br': app.config.get('COMPRESS_BROTLI_LEVEL', 4),
+        'gzip': app.config.get('COMPRESS_GZIP_LEVEL', 6),
+    }
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+    offered = available_encodings()
+
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or request.method == 'HEAD'
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+
+        encoding = negotiate_encoding(request.accept_encodings, offered)
+        response.vary.add('Accept-Encoding')
+        if encoding is None:
+            return response
+
+        compressor = _Compressor(encoding, levels[encoding])
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, compressor)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compressor.compress(data) + compressor.finish())
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # The encoded body is a different byte sequence from the original
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def _write_variant(path, suffix, content):
+    with open(path + suffix + '.tmp', 'wb') as f:
+        f.write(content)
+    os.replace(path + suffix + '.tmp', path + suffix)
+    # Same mtime as the source, so the fast path treats the variant as current
+    st = os.stat(path)
+    os.utime(path + suffix, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def precompress_static(static_folder):
+    """Write .gz (and .br, with brotli installed) next to compressible files under static/.
+
+    Variants are only kept when smaller than the original and are skipped
+    when already up to date. Returns the number of files written.
+    """
+    written = 0
+    for root, _, filenames in os.walk(static_folder):
+        for filename in filenames:
+            if os.path.splitext(filename)[1] not in PRECOMPRESS_EXTENSIONS:
+                continue
+            path = os.path.join(root, filename)
+            mtime = os.stat(path).st_mtime_ns
+            with open(path, 'rb') as f:
+                content = f.read()
+            for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+                if encoding == 'br' and brotli is None:
+                    continue
+                try:
+                    if os.stat(path + suffix).st_mtime_ns == mtime:
+                        continue
+                except OSError:
+                    pass
+                if encoding == 'br':
+                    compressed = brotli.compress(content, quality=11)
+                else:
+                    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+                if len(compressed) < len(content):
+                    _write_variant(path, suffix, compressed)
+                    written += 1
+    return written
+
+
+def register_compression_commands(app):
+    @app.cli.command('static-compress')
+    def static_compress():
+        """Write precompressed .gz/.br siblings for files under static/."""
+        written = precompress_static(app.static_folder)
+        click.echo(f'Precompressed {written} file(s).')
+        if brotli is None:
+            click.echo('brotli is not installed: only .gz variants were written.')
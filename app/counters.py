@@ -0,0 +1,148 @@
+import click
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.util import identity_key
+from models import db, Course, CourseModule, CourseMaterial, CourseEnrollment, MaterialComment, MaterialSubmission
+
+# Denormalized child counts: (child model, foreign key attribute, parent model, counter column).
+# Listing pages read the column instead of counting rows per parent.
+COUNTERS = (
+    (CourseModule, 'course_id', Course, 'module_count'),
+    (CourseEnrollment, 'course_id', Course, 'enrollment_count'),
+    (CourseMaterial, 'module_id', CourseModule, 'material_count'),
+    (MaterialComment, 'material_id', CourseMaterial, 'comment_count'),
+    (MaterialSubmission, 'material_id', CourseMaterial, 'submission_count'),
+)
+
+
+def _counter_values(table, column, value):
+    values = {column: value}
+    if 'updated_at' in table.c:
+        # A new child is not an edit of the parent: keep onupdate from firing
+        values['updated_at'] = table.c.updated_at
+    return values
+
+
+def _adjust(connection, target, parent, column, parent_id, delta):
+    """Move a parent's counter by delta in the database, relative to its current value."""
+    if parent_id is None:
+        return
+    table = parent.__table__
+    connection.execute(
+        table.update().where(table.c.id == parent_id).values(_counter_values(table, column, table.c[column] + delta))
+    )
+    # The in-session parent, if any, still holds the old count
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('stale_counters', set()).add((parent, parent_id, column))
+
+
+def _listen(child, fk, parent, column):
+    # Keep the old parent id when the foreign key is assigned on an expired row
+    event.listen(getattr(child, fk), 'set', lambda *args: None, active_history=True)
+
+    @event.listens_for(child, 'after_insert')
+    def _child_inserted(mapper, connection, target):
+        _adjust(connection, target, parent, column, getattr(target, fk), 1)
+
+    @event.listens_for(child, 'after_delete')
+    def _child_deleted(mapper, connection, target):
+        _adjust(connection, target, parent, column, getattr(target, fk), -1)
+
+    @event.listens_for(child, 'after_update')
+    def _child_moved(mapper, connection, target):
+        history = inspect(target).attrs[fk].history
+        if not history.has_changes():
+            return
+        for old_id in history.deleted:
+            _adjust(connection, target, parent, column, old_id, -1)
+        for new_id in history.added:
+            _adjust(connection, target, parent, column, new_id, 1)
+
+
+for _counter in COUNTERS:
+    _listen(*_counter)
+
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _expire_stale_counters(session, flush_context):
+    for parent, parent_id, column in session.info.pop('stale_counters', ()):
+        obj = session.identity_map.get(identity_key(parent, parent_id))
+        if obj is not None:
+            session.expire(obj, [column])
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_stale_counters(session):
+    session.info.pop('stale_counters', None)
+
+
+def _actual_count(child, fk, parent):
+    return (
+        select(func.count())
+        .select_from(child.__table__)
+        .where(child.__table__.c[fk] == parent.__table__.c.id)
+        .scalar_subquery()
+    )
+
+
+def verify_counters(repair=False):
+    """Compare every counter column with a fresh COUNT of its children.
+
+    Returns a list of (table, column, parent id, stored, actual) for each
+    mismatch; with repair=True the columns are reset to the actual counts in
+    the same transaction. Writes that bypass the ORM (bulk query updates or
+    deletes, raw SQL, manual edits) are what cause drift.
+    """
+    drift = []
+    for child, fk, parent, column in COUNTERS:
+        table = parent.__table__
+        actual = _actual_count(child, fk, parent)
+        rows = db.session.execute(
+            select(table.c.id, table.c[column], actual).where(table.c[column] != actual)
+        ).all()
+        drift.extend((table.name, column, *row) for row in rows)
+        if repair and rows:
+            db.session.execute(
+                table.update().where(table.c[column] != actual).values(_counter_values(table, column, actual))
+            )
+    if repair:
+        db.session.commit()
+    return drift
+
+
+def _migrate(connection):
+    inspector = inspect(connection)
+    for child, fk, parent, column in COUNTERS:
+        table = parent.__table__.name
+        if not inspector.has_table(table):
+            continue
+        columns = {c['name'] for c in inspector.get_columns(table)}
+        if column not in columns:
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0'))
+            connection.execute(parent.__table__.update().values(
+                _counter_values(parent.__table__, column, _actual_count(child, fk, parent))
+            ))
+
+
+def init_counters(app):
+    """Add counter columns to tables created before they existed, filled from current rows."""
+    with app.app_context():
+        with db.engine.begin() as connection:
+            _migrate(connection)
+
+
+def register_counter_commands(app):
+    @app.cli.command('counters-verify')
+    @click.option('--repair', is_flag=True, help='Reset drifted counters to the actual counts.')
+    def counters_verify(repair):
+        """Check denormalized child counts against the rows they count."""
+        drift = verify_counters(repair=repair)
+        for table, column, parent_id, stored, actual in drift:
+            click.echo(f'{table}.{column} id={parent_id}: stored {stored}, actual {actual}')
+        if not drift:
+            click.echo('All counters match.')
+        elif repair:
+            click.echo(f'Repaired {len(drift)} counter(s).')
+        else:
+            click.echo(f'{len(drift)} counter(s) drifted; run with --repair to fix.')
@@ -0,0 +1,69 @@
+import os
+from flask import current_app, request
+from werkzeug.utils import safe_join, send_file
+from app.storage import BLOB_DIR, relative_upload_path
+
+# Blob names never change content, so browsers may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def blob_etag(path):
+    """Strong validator for a content-addressed blob: its SHA-256."""
+    name = path.rsplit('/', 1)[-1]
+    return name.split('.', 1)[0]
+
+
+def send_upload(path, as_attachment=False, download_name=None):
+    """Send a file from UPLOAD_FOLDER, or return None if it does not exist.
+
+    path may be any stored reference form ('/uploads/...', relative or absolute).
+    Responses carry an ETag and Last-Modified, answer If-None-Match /
+    If-Modified-Since with 304 and honour Range requests. Content-addressed
+    blobs use their hash as a strong ETag and are cached privately for a year
+    as immutable.
+
+    With UPLOAD_OFFLOAD set to 'x-sendfile' or 'x-accel' the body is left to
+    the front proxy (X-Sendfile with the file path, or X-Accel-Redirect with
+    UPLOAD_ACCEL_PREFIX + the relative path); validators and 304s are still
+    handled here, byte ranges by the proxy.
+    """
+    relative = relative_upload_path(path)
+    if not relative:
+        return None
+    full_path = safe_join(current_app.config['UPLOAD_FOLDER'], relative)
+    if full_path is None or not os.path.isfile(full_path):
+        return None
+
+    is_blob = relative.startswith(BLOB_DIR + '/')
+    offload = current_app.config.get('UPLOAD_OFFLOAD')
+
+    response = send_file(
+        full_path,
+        request.environ,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=not offload,
+        etag=blob_etag(relative) if is_blob else True,
+        max_age=IMMUTABLE_MAX_AGE if is_blob else None,
+        use_x_sendfile=bool(offload),
+        response_class=current_app.response_class,
+    )
+
+    # Uploads sit behind login: never let shared caches keep them
+    response.cache_control.public = None
+    response.cache_control.private = True
+    if is_blob:
+        response.cache_control.immutable = True
+
+    if not offload:
+        # Advertise ranges on full responses so PDF viewers fetch incrementally
+        response.accept_ranges = 'bytes'
+    else:
+        # The proxy supplies the body and its length
+        response.headers.pop('Content-Length', None)
+        if offload == 'x-accel':
+            del response.headers['X-Sendfile']
+            prefix = current_app.config.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads/')
+            response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + relative
+        response = response.make_conditional(request)
+    return response
@@ -0,0 +1,43 @@
+import os
+from models import db
+
+DEFAULT_DATABASE_URI = 'sqlite:///eleary.db'
+
+
+def database_uri():
+    """SQLAlchemy URI from DATABASE_URL, defaulting to the local SQLite file."""
+    uri = os.getenv('DATABASE_URL') or DEFAULT_DATABASE_URI
+    # Some hosts still hand out the postgres:// scheme SQLAlchemy no longer accepts
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(uri):
+    """Connection pool settings for server databases, from DB_* environment variables.
+
+    SQLite keeps SQLAlchemy's defaults; its connections are tuned by app/sqlite.py.
+    """
+    if uri.startswith('sqlite'):
+        return {}
+    options = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '1').lower() not in ('0', 'false', 'no'),
+    }
+    statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT', 30000))
+    if uri.startswith('postgresql') and statement_timeout:
+        # Milliseconds; a runaway query is cancelled instead of holding a pooled connection
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
+
+def dialect_insert(table):
+    """INSERT construct for the bound database that supports ON CONFLICT clauses."""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
@@ -0,0 +1,245 @@
+import mimetypes
+import os
+import stat
+import time
+from datetime import timedelta
+from urllib.parse import parse_qs
+from werkzeug.http import http_date, parse_accept_header, parse_date, quote_etag
+from werkzeug.security import safe_join
+from app.assets import DIST_DIR
+from app.cache import MemoryCache
+from app.compression import PRECOMPRESSED_SUFFIXES, negotiate_encoding
+from app.delivery import IMMUTABLE_MAX_AGE, blob_etag
+from app.signed_urls import ASSET_PREFIX, verify_asset_signature
+from app.storage import BLOB_DIR
+
+_BLOCK_SIZE = 64 * 1024
+
+
+class _Entry:
+    """Precomputed response data for one file, valid while its mtime and size match."""
+
+    __slots__ = ('mtime_ns', 'size', 'etag', 'headers', 'variants')
+
+    def __init__(self, mtime_ns, size, etag, headers, variants):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.etag = etag
+        self.headers = headers
+        self.variants = variants
+
+
+class StaticFastPath:
+    """WSGI middleware serving /static/ and signed upload URLs without entering Flask.
+
+    Mounted around app.wsgi_app, so these requests skip request-context setup,
+    sessions, Flask-Login, before_request hooks and error handlers. Per file it
+    caches the headers (type, length, ETag, Last-Modified) and which
+    precompressed .br/.gz siblings exist (see `flask static-compress`), re-checked with a single stat().
+    Conditional requests get 304s, identity responses honour single byte
+    ranges, and bodies go through wsgi.file_wrapper (sendfile under gunicorn
+    or uWSGI) or the UPLOAD_OFFLOAD proxy headers. Anything it cannot answer
+    with a 200/206/304 (missing files, bad signatures, other methods) falls
+    through to Flask unchanged.
+    """
+
+    def __init__(self, wsgi_app, app):
+        self.wsgi_app = wsgi_app
+        self.app = app
+        self.static_prefix = (app.static_url_path or '/static').rstrip('/') + '/'
+        # The TTL lets variants written later by `flask static-compress` be noticed
+        self._entries = MemoryCache(max_entries=4096, default_ttl=60)
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') in ('GET', 'HEAD'):
+            path = environ.get('PATH_INFO', '')
+            if path.startswith(self.static_prefix):
+                response = self._static(environ, path[len(self.static_prefix):])
+            elif path.startswith(ASSET_PREFIX):
+                response = self._signed_upload(environ, path[len(ASSET_PREFIX):])
+            else:
+                response = None
+            if response is not None:
+                status, headers, body = response
+                start_response(status, headers)
+                return body
+        return self.wsgi_app(environ, start_response)
+
+    def _static(self, environ, filename):
+        full_path = safe_join(self.app.static_folder, filename)
+        if full_path is None:
+            return None
+        max_age = self._static_max_age()
+        if filename.startswith(DIST_DIR + '/'):
+            # Fingerprinted bundle names change whenever their content does
+            cache_control = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        elif max_age:
+            cache_control = f'public, max-age={max_age}'
+        else:
+            cache_control = 'no-cache'
+        return self._serve(environ, full_path, cache_control, compressible=True)
+
+    def _static_max_age(self):
+        # Same setting Flask's own static view uses; read directly, as there is no app context here
+        value = self.app.config.get('SEND_FILE_MAX_AGE_DEFAULT')
+        if isinstance(value, timedelta):
+            return int(value.total_seconds())
+        return value
+
+    def _signed_upload(self, environ, filename):
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        expires = query.get('e', [None])[0]
+        signature = query.get('s', [None])[0]
+        config = self.app.config
+        if not verify_asset_signature(filename, expires, signature, secret_key=config['SECRET_KEY']):
+            return None
+        full_path = safe_join(config['UPLOAD_FOLDER'], filename)
+        if full_path is None:
+            return None
+
+        is_blob = filename.startswith(BLOB_DIR + '/')
+        if is_blob:
+            remaining = max(min(int(expires) - int(time.time()), IMMUTABLE_MAX_AGE), 0)
+            cache_control = f'public, max-age={remaining}, immutable'
+        else:
+            cache_control = 'public, no-cache'
+        return self._serve(
+            environ, full_path, cache_control,
+            etag=blob_etag(filename) if is_blob else None,
+            offload=config.get('UPLOAD_OFFLOAD'),
+            relative=filename
+        )
+
+    def _entry(self, full_path, st, etag):
+        entry = self._entries.get(full_path)
+        if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+            return entry
+
+        mimetype, _ = mimetypes.guess_type(full_path)
+        mimetype = mimetype or 'application/octet-stream'
+        if mimetype.startswith('text/') or mimetype in ('application/javascript', 'application/json'):
+            mimetype += '; charset=utf-8'
+        etag = quote_etag(etag or f'{st.st_mtime_ns:x}-{st.st_size:x}')
+        headers = [
+            ('Content-Type', mimetype),
+            ('ETag', etag),
+            ('Last-Modified', http_date(st.st_mtime)),
+        ]
+        variants = {}
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+            try:
+                variant = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if variant.st_mtime_ns >= st.st_mtime_ns:
+                variants[encoding] = (full_path + suffix, variant.st_size)
+        entry = _Entry(st.st_mtime_ns, st.st_size, etag, headers, variants)
+        self._entries.set(full_path, entry)
+        return entry
+
+    def _serve(self, environ, full_path, cache_control, etag=None, compressible=False,
+               offload=None, relative=None):
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        entry = self._entry(full_path, st, etag)
+
+        path, size, etag = full_path, entry.size, entry.etag
+        encoding = None
+        if compressible and entry.variants and offload is None:
+            accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+            encoding = negotiate_encoding(accept, entry.variants)
+            if encoding:
+                path, size = entry.variants[encoding]
+                # Each representation needs its own validator
+                etag = f'{etag[:-1]}-{encoding}"'
+
+        headers = [(name, etag if name == 'ETag' else value) for name, value in entry.headers]
+        headers.append(('Cache-Control', cache_control))
+        if compressible and entry.variants:
+            headers.append(('Vary', 'Accept-Encoding'))
+
+        if self._not_modified(environ, etag, st):
+            return '304 Not Modified', headers, []
+
+        if offload and relative:
+            if offload == 'x-accel':
+                prefix = self.app.config.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads/')
+                headers.append(('X-Accel-Redirect', prefix.rstrip('/') + '/' + relative))
+            else:
+                headers.append(('X-Sendfile', full_path))
+            return '200 OK', headers, []
+
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        else:
+            headers.append(('Accept-Ranges', 'bytes'))
+            byte_range = self._range(environ.get('HTTP_RANGE'), size)
+            if byte_range is not None:
+                start, end = byte_range
+                headers.append(('Content-Range', f'bytes {start}-{end}/{size}'))
+                headers.append(('Content-Length', str(end - start + 1)))
+                return '206 Partial Content', headers, self._body(environ, path, start, end - start + 1)
+
+        headers.append(('Content-Length', str(size)))
+        return '200 OK', headers, self._body(environ, path, 0, size)
+
+    @staticmethod
+    def _not_modified(environ, etag, st):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags
+        if_modified_since = parse_date(environ.get('HTTP_IF_MODIFIED_SINCE'))
+        return if_modified_since is not None and int(st.st_mtime) <= if_modified_since.timestamp()
+
+    @staticmethod
+    def _range(header, size):
+        """(start, end) for a single satisfiable 'bytes=' range, else None (full response)."""
+        if not header or not header.startswith('bytes=') or ',' in header:
+            return None
+        first, _, last = header[len('bytes='):].strip().partition('-')
+        try:
+            if first:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            else:
+                start = max(size - int(last), 0)
+                end = size - 1
+        except ValueError:
+            return None
+        if start > end or start >= size:
+            return None
+        return start, end
+
+    @staticmethod
+    def _body(environ, path, offset, length):
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return []
+        f = open(path, 'rb')
+        if offset == 0 and length == os.fstat(f.fileno()).st_size and 'wsgi.file_wrapper' in environ:
+            return environ['wsgi.file_wrapper'](f, _BLOCK_SIZE)
+        f.seek(offset)
+        return _FileRange(f, length)
+
+
+class _FileRange:
+    """Iterate over length bytes of an open file, closing it afterwards."""
+
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+
+    def __iter__(self):
+        while self.remaining > 0:
+            chunk = self.f.read(min(_BLOCK_SIZE, self.remaining))
+            if not chunk:
+                break
+            self.remaining -= len(chunk)
+            yield chunk
+
+    def close(self):
+        self.f.close()
@@ -0,0 +1,123 @@
+import uuid
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import event
+from models import db, Course, CourseModule, CourseMaterial, News, User
+from app.cache import MemoryCache
+from app.signed_urls import asset_expiry
+
+# Models whose writes invalidate fragments. Every change to a row tags
+# '<table>' and '<table>:<id>'; these add the parent it is rendered under.
+_PARENT_TAGS = {
+    Course: lambda course: (),
+    CourseModule: lambda module: (f'course:{module.course_id}',),
+    CourseMaterial: lambda material: (f'course_module:{material.module_id}',),
+    News: lambda article: (),
+    # Usernames of instructors and authors appear on course and news cards
+    User: lambda user: (),
+}
+
+
+class FragmentCache:
+    """Rendered template fragments keyed by dependency generations.
+
+    Each dependency tag has a generation token stored in the backend next to
+    the fragments; invalidating a tag replaces its token, so every fragment
+    that listed it misses on its next render while unrelated ones stay
+    cached. A token that has been evicted or expired is simply recreated,
+    which can only cause a miss, never a stale hit. The backend is anything
+    with MemoryCache's get/set; a shared one makes invalidation reach every
+    worker, the default per-process cache does so within its TTL.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryCache()
+
+    def configure(self, backend):
+        self.backend = backend
+
+    def _generation(self, tag):
+        key = f'fragment-gen:{tag}'
+        token = self.backend.get(key)
+        if token is None:
+            token = uuid.uuid4().hex
+            self.backend.set(key, token)
+        return token
+
+    def fetch(self, key, deps, render):
+        # Fragments may contain signed asset URLs, which must not outlive their period
+        generations = tuple((tag, self._generation(tag)) for tag in deps)
+        full_key = f'fragment:{key!r}:{generations!r}:{asset_expiry()}'
+        html = self.backend.get(full_key)
+        if html is None:
+            html = str(render())
+            self.backend.set(full_key, html)
+        return Markup(html)
+
+    def invalidate(self, tags):
+        for tag in tags:
+            self.backend.set(f'fragment-gen:{tag}', uuid.uuid4().hex)
+
+
+fragment_cache = FragmentCache()
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache key, deps %}...{% endcache %}
+
+    key identifies the fragment (a string or tuple of everything the output
+    depends on besides the dependencies); deps is a list of tags such as
+    'news' or 'course:12'. Keep per-user content outside the block. A hit
+    saves rendering only: the queries the view ran for the block's
+    variables still run.
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        deps = nodes.List([])
+        if parser.stream.skip_if('comma'):
+            deps = parser.parse_expression()
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [key, deps]), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, deps, caller):
+        return fragment_cache.fetch(key, deps, caller)
+
+
+def _tags_for(obj):
+    table = obj.__table__.name
+    return (table, f'{table}:{obj.id}') + _PARENT_TAGS[type(obj)](obj)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_fragment_tags(session, flush_context):
+    tags = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if type(obj) in _PARENT_TAGS:
+            tags.update(_tags_for(obj))
+    if tags:
+        session.info.setdefault('fragment_tags', set()).update(tags)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_fragments(session):
+    tags = session.info.pop('fragment_tags', None)
+    if tags:
+        fragment_cache.invalidate(tags)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_fragment_tags(session):
+    session.info.pop('fragment_tags', None)
+
+
+def init_fragment_cache(app):
+    backend = app.config.get('FRAGMENT_CACHE_BACKEND')
+    if backend is None:
+        backend = MemoryCache(max_entries=2048, default_ttl=app.config.get('FRAGMENT_CACHE_TTL', 300))
+    fragment_cache.configure(backend)
+    app.jinja_env.add_extension(FragmentCacheExtension)
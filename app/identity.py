@@ -0,0 +1,84 @@
+from threading import Lock
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached, object_session
+from models import db, User
+from app.cache import MemoryCache
+from app.profile import load_user_with_profile
+
+# user_id -> {column: value}; column values only, never live ORM instances
+_user_cache = MemoryCache(max_entries=4096)
+_USER_COLUMNS = tuple(c.key for c in User.__table__.columns)
+
+_admin_lock = Lock()
+_admin_exists = False
+
+
+def load_user(user_id):
+    """Flask-Login user loader backed by a short-TTL per-process cache.
+
+    On a hit the User is rebuilt from cached column values and merged into the
+    session without a SELECT, so it behaves like a normally loaded row (changes
+    are flushed on commit). On a miss the user is loaded with its profile and
+    cached for USER_CACHE_TTL seconds.
+    """
+    ttl = current_app.config.get('USER_CACHE_TTL', 10)
+    if ttl:
+        values = _user_cache.get(user_id)
+        if values is not None:
+            user = User(**values)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+    user = load_user_with_profile(user_id)
+    if user is not None and ttl:
+        _user_cache.set(user_id, {key: getattr(user, key) for key in _USER_COLUMNS}, ttl=ttl)
+    return user
+
+
+def invalidate_user(user_id):
+    """Drop a cached user so the next request reloads it from the database."""
+    _user_cache.delete(user_id)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    # Evict at flush time and again after commit, so a concurrent request
+    # cannot re-cache the pre-commit row for a full TTL.
+    _user_cache.delete(target.id)
+    object_session(target).info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _evict_committed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        _user_cache.delete(user_id)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_user_ids', None)
+
+
+def admin_exists():
+    """Whether any admin account exists; latched in-process once it is true."""
+    global _admin_exists
+    if _admin_exists:
+        return True
+    with _admin_lock:
+        if not _admin_exists:
+            _admin_exists = User.query.filter_by(role='admin').first() is not None
+        return _admin_exists
+
+
+def admin_removed():
+    """Re-check the admin latch after an admin was deleted or demoted.
+
+    The latch is only released when no admin remains, so the setup page
+    becomes reachable again in this worker.
+    """
+    global _admin_exists
+    with _admin_lock:
+        if User.query.filter_by(role='admin').first() is None:
+            _admin_exists = False
@@ -0,0 +1,248 @@
+import json
+import re
+import threading
+from collections import defaultdict
+import click
+from sqlalchemy import event, inspect, text
+from models import db
+
+# Single-column indexes superseded by composite indexes that start with the same column
+_OBSOLETE_INDEXES = (
+    ('logbook_entry', 'ix_logbook_entry_student_id'),
+    ('daily_journal', 'ix_daily_journal_student_id'),
+    ('incident_report', 'ix_incident_report_student_id'),
+    ('patient_case', 'ix_patient_case_student_id'),
+)
+
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)$')
+_SQLITE_TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)')
+_PG_SCAN = re.compile(r'Seq Scan on (\w+)')
+_PG_SORT = re.compile(r'^\s*(?:->\s*)?Sort\s+\(')
+
+
+class QueryCapture:
+    """Appends each distinct SELECT the app runs, with its first parameters, to a JSON-lines file.
+
+    Enabled with QUERY_CAPTURE_PATH; the file is what `flask index-advise`
+    reads. Meant for development and test runs, not production.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._seen = set()
+
+    def attach(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith('SELECT'):
+            return
+        with self._lock:
+            if statement in self._seen:
+                return
+            self._seen.add(statement)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'sql': statement, 'params': parameters}, default=str) + '\n')
+
+
+def load_captured(path):
+    """Distinct (sql, params) pairs from a capture file."""
+    queries = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                queries.setdefault(entry['sql'], entry['params'])
+    return list(queries.items())
+
+
+def explain(connection, sql, params):
+    """The database's plan for sql as a list of lines."""
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, tuple(params or ()))
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql('EXPLAIN ' + sql, params or {})
+    return [row[0] for row in rows]
+
+
+def plan_problems(dialect, plan):
+    """(kind, table) for every full table scan and temporary sort in a plan.
+
+    table is None for sorts, whose table has to be read from the SQL.
+    """
+    problems = []
+    for line in plan:
+        if dialect == 'sqlite':
+            scan, sort = _SQLITE_SCAN.match(line.strip()), _SQLITE_TEMP_SORT.search(line)
+        else:
+            scan, sort = _PG_SCAN.search(line), _PG_SORT.match(line)
+        if scan:
+            problems.append(('full scan', scan.group(1)))
+        elif sort:
+            problems.append(('temp sort', None))
+    return problems
+
+
+def _column_refs(sql, table):
+    """Columns of table used in sql, by role: equality, null test, range and ORDER BY."""
+    # SQLAlchemy qualifies columns with the table name, or table_N when aliased
+    ref = rf'"?{table}(?:_\d+)?"?\."?(\w+)"?'
+    where, _, order_by = sql.partition('ORDER BY')
+    roles = {
+        # Compared with a parameter or literal; join conditions compare with another column
+        'equality': re.findall(ref + r'\s*(?:=\s*(?:\?|%\(|:|\d|\')|IN\b)', where),
+        'null': re.findall(ref + r'\s+IS\s+(NOT\s+)?NULL', where),
+        'range': re.findall(ref + r'\s*(?:<=|>=|<|>)', where),
+        'order': re.findall(ref, order_by),
+    }
+    return roles
+
+
+def _dedupe(columns):
+    return list(dict.fromkeys(columns))
+
+
+def propose_index(sql, table):
+    """An index (columns, partial WHERE or None) that would let sql search table instead of scanning or sorting it.
+
+    Equality columns lead, then ORDER BY or range columns; a column only
+    ever tested for NULL becomes the partial index's WHERE clause.
+    """
+    roles = _column_refs(sql, table)
+    equality = _dedupe(roles['equality'])
+    columns = _dedupe(equality + (roles['order'] or roles['range']))
+    where = [f'{column} IS {"NOT " if negated else ""}NULL'
+             for column, negated in roles['null'] if column not in columns]
+    if not columns:
+        if not where:
+            return None
+        # Nothing else to search by: index the partial set by primary key
+        columns = ['id']
+    return tuple(columns), ' AND '.join(_dedupe(where)) or None
+
+
+def _sort_table(sql):
+    """Table of the leading ORDER BY column; only an index on it can replace the sort."""
+    _, _, order_by = sql.partition('ORDER BY')
+    match = re.search(r'"?([a-z_]+?)(?:_\d+)?"?\.\w+', order_by)
+    return match.group(1) if match else None
+
+
+def _covering_index(connection, table, columns):
+    """Name of an existing index on table whose leading columns are columns, if any."""
+    for index in inspect(connection).get_indexes(table):
+        if tuple(index['column_names'][:len(columns)]) == tuple(columns):
+            return index['name']
+    return None
+
+
+def advise(connection, queries):
+    """Explain every captured query and collect index proposals.
+
+    Returns (findings, proposals): findings lists (sql, plan, problems) for
+    queries with problems; proposals maps (table, columns, where) to the
+    number of those queries it would help, with the name of an existing
+    index that already provides it (then the planner most likely preferred
+    a scan because the table is small or has no statistics; run ANALYZE).
+    """
+    dialect = connection.dialect.name
+    tables = set(inspect(connection).get_table_names())
+    findings = []
+    proposals = defaultdict(lambda: {'queries': 0, 'existing': None})
+    for sql, params in queries:
+        try:
+            plan = explain(connection, sql, params)
+        except Exception as exc:
+            findings.append((sql, [f'could not explain: {exc}'], []))
+            continue
+        problems = plan_problems(dialect, plan)
+        if not problems:
+            continue
+        findings.append((sql, plan, problems))
+        targets = {table for _, table in problems if table in tables}
+        if any(kind == 'temp sort' for kind, _ in problems):
+            table = _sort_table(sql)
+            if table in tables:
+                targets.add(table)
+        for table in targets:
+            proposal = propose_index(sql, table)
+            if proposal is None:
+                continue
+            key = (table,) + proposal
+            proposals[key]['queries'] += 1
+            proposals[key]['existing'] = _covering_index(connection, table, proposal[0])
+    return findings, dict(proposals)
+
+
+def create_index_sql(table, columns, where):
+    name = f'ix_{table}_{"_".join(columns)}' + ('_partial' if where else '')
+    sql = f'CREATE INDEX {name} ON "{table}" ({", ".join(columns)})'
+    return sql + (f' WHERE {where}' if where else '')
+
+
+def _migrate(connection):
+    inspector = inspect(connection)
+    created = False
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+                created = True
+    for table, name in _OBSOLETE_INDEXES:
+        if inspector.has_table(table) and name in {index['name'] for index in inspector.get_indexes(table)}:
+            connection.execute(text(f'DROP INDEX {name}'))
+    if created and connection.dialect.name == 'sqlite':
+        # Give the planner statistics so it actually picks the new indexes
+        connection.execute(text('ANALYZE'))
+
+
+def init_indexes(app):
+    """Create indexes declared in models.py that an existing database lacks, and drop superseded ones."""
+    with app.app_context():
+        with db.engine.begin() as connection:
+            _migrate(connection)
+        path = app.config.get('QUERY_CAPTURE_PATH')
+        if path:
+            capture = QueryCapture(path)
+            capture.attach(db.engine)
+            if 'read_engine' in app.extensions:
+                capture.attach(app.extensions['read_engine'])
+
+
+def register_index_commands(app):
+    @app.cli.command('index-advise')
+    @click.argument('capture_file', required=False)
+    @click.option('--verbose', is_flag=True, help='Print the plan of every flagged query.')
+    def index_advise(capture_file, verbose):
+        """Explain captured queries, flag full scans and temp sorts, and propose indexes.
+
+        Capture queries by running the app or test suite with QUERY_CAPTURE_PATH set.
+        """
+        path = capture_file or app.config.get('QUERY_CAPTURE_PATH')
+        if not path:
+            raise click.UsageError('Pass a capture file or set QUERY_CAPTURE_PATH.')
+        queries = load_captured(path)
+        with db.engine.connect() as connection:
+            findings, proposals = advise(connection, queries)
+
+        click.echo(f'{len(queries)} distinct queries, {len(findings)} with full scans or temp sorts.')
+        for sql, plan, problems in findings:
+            if verbose:
+                click.echo('\n' + sql)
+                for line in plan:
+                    click.echo(f'    {line}')
+            else:
+                summary = ', '.join(f'{kind} {table}' if table else kind for kind, table in problems)
+                click.echo(f'- {summary}: {" ".join(sql.split())[:120]}')
+
+        if proposals:
+            click.echo('\nProposed indexes:')
+        for (table, columns, where), info in sorted(proposals.items(), key=lambda item: -item[1]['queries']):
+            line = f'{create_index_sql(table, columns, where)};  -- {info["queries"]} queries'
+            if info['existing']:
+                line += f' (already provided by {info["existing"]}; run ANALYZE)'
+            click.echo(line)
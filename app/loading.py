@@ -0,0 +1,24 @@
+from sqlalchemy.orm import joinedload
+from models import Course, News, MaterialComment, LibraryBook, LegalDocument, StudentProfile
+
+# Loader options per way a listing renders its rows: every relationship a
+# template dereferences is fetched with the rows themselves, so a
+# page costs the same number of queries however many rows it shows.
+# Built on use, once the mappers (and their backrefs) are configured.
+_PROFILES = {
+    # courses.html, course_detail.html, admin_courses.html: instructor name
+    'course_card': lambda: (joinedload(Course.instructor_user),),
+    # news.html, dashboard.html, admin_news.html: author name
+    'news_card': lambda: (joinedload(News.author),),
+    # material_detail.html: comment author name and role
+    'comment_thread': lambda: (joinedload(MaterialComment.author),),
+    # library.html, admin_approvals.html: uploader details
+    'library_card': lambda: (joinedload(LibraryBook.uploader),),
+    # admin_clinical_documents.html: student's account name
+    'document_review': lambda: (joinedload(LegalDocument.student).joinedload(StudentProfile.user),),
+}
+
+
+def load_profile(query, name):
+    """Apply the named loader profile to a query."""
+    return query.options(*_PROFILES[name]())
@@ -0,0 +1,180 @@
+from datetime import date, datetime
+from math import ceil
+from sqlalchemy import event, tuple_
+from sqlalchemy.orm import object_session
+from models import db
+from app.cache import MemoryCache
+
+# (model name, count key, generation) -> total rows
+_count_cache = MemoryCache(max_entries=2048, default_ttl=60)
+_generations = {}
+
+_CURSOR_SEP = '~'
+
+
+def _generation(model):
+    return _generations.get(model.__name__, 0)
+
+
+def _changed(mapper, connection, target):
+    # Counted only once the row is committed; see _bump_generations
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('count_models', set()).add(type(target).__name__)
+
+
+def _watch(model):
+    """Bump the model's count generation whenever a transaction that changed its rows commits."""
+    if model.__name__ in _generations:
+        return
+    _generations[model.__name__] = 0
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(model, name, _changed)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_generations(session):
+    # Bumping at flush would let a concurrent count of the old committed rows
+    # be cached under the new generation
+    for name in session.info.pop('count_models', ()):
+        _generations[name] = _generations.get(name, 0) + 1
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_count_models(session):
+    session.info.pop('count_models', None)
+
+
+def cached_count(query, model, count_key):
+    """Count the rows matched by query, reusing the total until the model changes.
+
+    Totals are kept per process for up to a minute; writes in this process
+    invalidate them immediately, writes in other workers within the TTL.
+    """
+    _watch(model)
+    key = (model.__name__, count_key, _generation(model))
+    total = _count_cache.get(key)
+    if total is None:
+        total = query.order_by(None).count()
+        _count_cache.set(key, total)
+    return total
+
+
+def encode_cursor(value, row_id):
+    """Encode a (sort value, id) pair for use in a URL."""
+    if value is None:
+        return None
+    return f'{value.isoformat()}{_CURSOR_SEP}{row_id}'
+
+
+def decode_cursor(cursor, column):
+    """Decode a cursor produced by encode_cursor for the given sort column, or None."""
+    if not cursor or _CURSOR_SEP not in cursor:
+        return None
+    raw_value, _, raw_id = cursor.rpartition(_CURSOR_SEP)
+    try:
+        python_type = column.type.python_type
+        if python_type is datetime:
+            value = datetime.fromisoformat(raw_value)
+        elif python_type is date:
+            value = date.fromisoformat(raw_value)
+        else:
+            value = python_type(raw_value)
+        return value, int(raw_id)
+    except (TypeError, ValueError, NotImplementedError):
+        return None
+
+
+class KeysetPage:
+    """Page of results compatible with Flask-SQLAlchemy's Pagination.
+
+    Exposes items, page, per_page, total, pages, has_prev/has_next,
+    prev_num/next_num and iter_pages(), plus prev_cursor/next_cursor for
+    seek-based navigation to the neighbouring pages.
+    """
+
+    def __init__(self, items, page, per_page, total, has_next, prev_cursor=None, next_cursor=None):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.has_next = has_next
+        self.prev_cursor = prev_cursor
+        self.next_cursor = next_cursor
+
+    @property
+    def pages(self):
+        if not self.per_page or not self.total:
+            return 0
+        return int(ceil(self.total / float(self.per_page)))
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def prev_num(self):
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self.has_next else None
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=4, right_edge=2):
+        last = 0
+        for num in range(1, self.pages + 1):
+            if (num <= left_edge
+                    or self.page - left_current - 1 < num < self.page + right_current
+                    or num > self.pages - right_edge):
+                if last + 1 != num:
+                    yield None
+                yield num
+                last = num
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def keyset_paginate(query, model, sort_column, page=1, per_page=20, after=None, before=None, count_key=None):
+    """Paginate query newest-first on (sort_column, id).
+
+    With an `after`/`before` cursor the page is fetched with a seek predicate,
+    so deep pages cost the same as the first one. Without a cursor (first page
+    or a direct jump to page N) it falls back to OFFSET. When sort_column is
+    None the query's own ordering is kept and OFFSET is always used.
+    The total comes from cached_count() keyed by count_key.
+    """
+    page = max(page or 1, 1)
+    total = cached_count(query, model, count_key)
+
+    if sort_column is None:
+        rows = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+        return KeysetPage(rows[:per_page], page, per_page, total, len(rows) > per_page)
+
+    key = tuple_(sort_column, model.id)
+    after_key = decode_cursor(after, sort_column)
+    before_key = decode_cursor(before, sort_column) if after_key is None else None
+
+    if after_key is not None:
+        rows = query.filter(key < tuple_(*after_key)).order_by(
+            sort_column.desc(), model.id.desc()
+        ).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+    elif before_key is not None:
+        rows = query.filter(key > tuple_(*before_key)).order_by(
+            sort_column.asc(), model.id.asc()
+        ).limit(per_page).all()
+        rows.reverse()
+        has_next = True
+    else:
+        rows = query.order_by(sort_column.desc(), model.id.desc()).limit(
+            per_page + 1
+        ).offset((page - 1) * per_page).all()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+
+    column_name = sort_column.key
+    prev_cursor = encode_cursor(getattr(rows[0], column_name), rows[0].id) if rows and page > 1 else None
+    next_cursor = encode_cursor(getattr(rows[-1], column_name), rows[-1].id) if rows and has_next else None
+    return KeysetPage(rows, page, per_page, total, has_next, prev_cursor, next_cursor)
@@ -0,0 +1,199 @@
+import logging
+import os
+import random
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from models import db
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s)(?:\s*,\s*(?:\?|%\(\w+\)s|%s))*\s*\)')
+_NAMED_PARAM = re.compile(r'%\(\w+\)s|:\w+\b')
+_WHITESPACE = re.compile(r'\s+')
+
+slow_query_log = logging.getLogger('eleary.slow_queries')
+
+
+def fingerprint(statement):
+    """statement with literals and parameters replaced by ?, so executions of one query shape group together.
+
+    IN lists of any length collapse to (...), whitespace to single spaces.
+    """
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _NAMED_PARAM.sub('?', statement)
+    statement = _IN_LIST.sub('(...)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+class RequestProfile:
+    """Queries one sampled request ran: count, DB time and time per fingerprint."""
+
+    __slots__ = ('started', 'queries', 'db_time', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = {}
+
+    def record(self, key, elapsed):
+        self.queries += 1
+        self.db_time += elapsed
+        count, total = self.statements.get(key, (0, 0.0))
+        self.statements[key] = (count + 1, total + elapsed)
+
+
+class EndpointStats:
+    __slots__ = ('requests', 'queries', 'max_queries', 'db_time', 'request_time', 'max_request_time', 'statements')
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_time = 0.0
+        self.request_time = 0.0
+        self.max_request_time = 0.0
+        # fingerprint -> [executions, total time, most executions in one request]
+        self.statements = {}
+
+
+class PerfStats:
+    """Per-endpoint aggregates of sampled requests, kept in this worker process's memory.
+
+    Each endpoint keeps its max_statements most expensive fingerprints; the
+    per-request maximum of a fingerprint is what exposes N+1 loops.
+    """
+
+    def __init__(self, max_statements=25):
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self.since = time.time()
+
+    def add(self, endpoint, profile, request_time):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.requests += 1
+            stats.queries += profile.queries
+            stats.max_queries = max(stats.max_queries, profile.queries)
+            stats.db_time += profile.db_time
+            stats.request_time += request_time
+            stats.max_request_time = max(stats.max_request_time, request_time)
+            for key, (count, total) in profile.statements.items():
+                entry = stats.statements.get(key)
+                if entry is None:
+                    stats.statements[key] = [count, total, count]
+                else:
+                    entry[0] += count
+                    entry[1] += total
+                    entry[2] = max(entry[2], count)
+            if len(stats.statements) > self.max_statements * 2:
+                keep = sorted(stats.statements.items(), key=lambda item: -item[1][1])[:self.max_statements]
+                stats.statements = dict(keep)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self.since = time.time()
+
+    def snapshot(self, top=10):
+        """Endpoints as dicts, most total DB time first, each with its top statements by total time."""
+        with self._lock:
+            rows = []
+            for endpoint, stats in self._endpoints.items():
+                statements = sorted(stats.statements.items(), key=lambda item: -item[1][1])[:top]
+                rows.append({
+                    'endpoint': endpoint,
+                    'requests': stats.requests,
+                    'avg_queries': stats.queries / stats.requests,
+                    'max_queries': stats.max_queries,
+                    'db_time': stats.db_time,
+                    'avg_db_ms': stats.db_time / stats.requests * 1000,
+                    'avg_request_ms': stats.request_time / stats.requests * 1000,
+                    'max_request_ms': stats.max_request_time * 1000,
+                    'statements': [
+                        {'sql': key, 'count': count, 'total_ms': total * 1000,
+                         'avg_ms': total / count * 1000, 'max_per_request': peak}
+                        for key, (count, total, peak) in statements
+                    ],
+                })
+        rows.sort(key=lambda row: -row['db_time'])
+        return rows
+
+
+def _configure_slow_log(app):
+    path = app.config.get('PERF_SLOW_LOG_PATH')
+    if not path or slow_query_log.handlers:
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    handler = RotatingFileHandler(path, maxBytes=app.config.get('PERF_SLOW_LOG_MAX_BYTES', 10 * 1024 * 1024),
+                                  backupCount=app.config.get('PERF_SLOW_LOG_BACKUPS', 5), delay=True)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    slow_query_log.addHandler(handler)
+    slow_query_log.setLevel(logging.INFO)
+    slow_query_log.propagate = False
+
+
+def _attach(engine, slow_threshold):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('perf_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('perf_started')
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        profile = g.get('perf_profile') if has_request_context() else None
+        if profile is None and elapsed < slow_threshold:
+            return
+        key = fingerprint(statement)
+        if profile is not None:
+            profile.record(key, elapsed)
+        if elapsed >= slow_threshold:
+            # Statement text only: parameters can hold personal data
+            endpoint = request.endpoint if has_request_context() else '-'
+            slow_query_log.info('%.1fms endpoint=%s %s', elapsed * 1000, endpoint, key)
+
+
+def init_perf(app):
+    """Profile the SQL of a PERF_SAMPLE_RATE share of requests and log slow statements.
+
+    Sampled requests get a Server-Timing header with their query count and
+    DB time, and feed the per-endpoint aggregates shown on /admin/perf.
+    Statements slower than PERF_SLOW_QUERY_MS are logged from every request
+    (and background threads) to PERF_SLOW_LOG_PATH, rotated by size.
+    """
+    rate = app.config.get('PERF_SAMPLE_RATE', 0)
+    slow_threshold = app.config.get('PERF_SLOW_QUERY_MS', 200) / 1000
+    stats = PerfStats(max_statements=app.config.get('PERF_MAX_STATEMENTS', 25))
+    app.extensions['perf_stats'] = stats
+    _configure_slow_log(app)
+
+    with app.app_context():
+        engines = [db.engine]
+    if 'read_engine' in app.extensions:
+        engines.append(app.extensions['read_engine'])
+    for engine in engines:
+        _attach(engine, slow_threshold)
+
+    @app.before_request
+    def start_profile():
+        if rate and random.random() < rate:
+            g.perf_profile = RequestProfile()
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop('perf_profile', None)
+        if profile is not None:
+            stats.add(request.endpoint or '-', profile, time.perf_counter() - profile.started)
+            response.headers.add('Server-Timing', f'db;dur={profile.db_time * 1000:.1f};desc="{profile.queries} queries"')
+        return response
@@ -0,0 +1,87 @@
+from flask import g, request, current_app, has_request_context
+from flask_login import current_user
+from sqlalchemy.orm import joinedload, selectinload
+from werkzeug.local import LocalProxy
+from models import User, StudentProfile
+
+# Collection names routes may declare with @with_profile(...), mapped to the
+# StudentProfile backrefs (resolved lazily, backrefs exist only once mappers configure)
+PROFILE_COLLECTIONS = {
+    'documents': 'legal_documents',
+    'agreements': 'agreements',
+    'assessments': 'preclinical_assessments',
+}
+
+_MISSING = object()
+
+
+def with_profile(*collections):
+    """Declare which StudentProfile collections a view reads.
+
+    The declared collections are fetched with selectinload in the same load
+    as the profile, so the view can iterate profile.legal_documents,
+    profile.agreements or profile.preclinical_assessments without extra queries.
+    """
+    unknown = set(collections) - set(PROFILE_COLLECTIONS)
+    if unknown:
+        raise ValueError(f'Unknown profile collections: {", ".join(sorted(unknown))}')
+
+    def decorator(f):
+        f._profile_collections = tuple(collections)
+        return f
+    return decorator
+
+
+def _requested_collections():
+    """Collections declared by the view handling the current request."""
+    if not has_request_context() or not request.endpoint:
+        return ()
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, '_profile_collections', ())
+
+
+def _collection_attrs():
+    return [getattr(StudentProfile, PROFILE_COLLECTIONS[name]) for name in _requested_collections()]
+
+
+def _remember(user_id, profile):
+    g._current_profile = (user_id, profile)
+
+
+def load_user_with_profile(user_id):
+    """Load a User for Flask-Login, join-loading the student profile when enabled.
+
+    The profile arrives in the same SELECT as the user and is stored on g, so
+    current_profile resolves without another round trip.
+    """
+    if not current_app.config.get('CURRENT_PROFILE_JOIN_USER', True):
+        return User.query.get(user_id)
+
+    loader = joinedload(User.student_profile)
+    user = User.query.options(loader, *[loader.selectinload(attr) for attr in _collection_attrs()]).get(user_id)
+    if user is not None and has_request_context():
+        _remember(user.id, user.student_profile[0] if user.student_profile else None)
+    return user
+
+
+def get_current_profile():
+    """Return the logged-in user's StudentProfile (or None), resolved once per request."""
+    if not current_user.is_authenticated:
+        return None
+
+    cached = g.get('_current_profile', _MISSING)
+    if cached is not _MISSING and cached[0] == current_user.id:
+        return cached[1]
+
+    options = [selectinload(attr) for attr in _collection_attrs()]
+    profile = StudentProfile.query.options(*options).filter_by(user_id=current_user.id).first()
+    _remember(current_user.id, profile)
+    return profile
+
+
+def reset_current_profile():
+    """Forget the resolved profile, e.g. after creating one mid-request."""
+    g.pop('_current_profile', None)
+
+
+current_profile = LocalProxy(get_current_profile)
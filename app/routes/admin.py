@@ -1,9 +1,14 @@
-import os
+import json
 from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash, jsonify
+from flask import current_app, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
-from models import db, User, Course, CourseModule, CourseMaterial, LibraryBook, ClinicalConfig, LegalDocument, StudentProfile
+from models import db, User, Course, CourseModule, CourseMaterial, LibraryBook, LegalDocument, StudentProfile
 from app.utils import admin_required, pemateri_required, sanitize_rich_text, convert_youtube_url, save_upload_image, allowed_image_file
+from app.storage import release_upload
+from app.clinical_config import get_clinical_config, get_clinical_config_row, invalidate_clinical_config
+from app.identity import admin_removed
+from app.pagination import keyset_paginate
+from app.loading import load_profile
 
 
 def register_admin_routes(app):
@@ -13,9 +18,13 @@ def register_admin_routes(app):
     def admin_approvals():
         """Admin page to approve/reject pending library documents."""
         page = request.args.get('page', 1, type=int)
-        pending_books = LibraryBook.query.filter_by(status='pending').order_by(LibraryBook.created_at.desc()).paginate(page=page, per_page=10)
+        pending_books = keyset_paginate(load_profile(LibraryBook.query, 'library_card').filter_by(status='pending'), LibraryBook, LibraryBook.created_at,
+                                        page=page, per_page=10,
+                                        after=request.args.get('after'), before=request.args.get('before'),
+                                        count_key='pending')
 
-        return render_template('admin_approvals.html', books=pending_books.items, total=pending_books.total, page=page)
+        return render_template('admin_approvals.html', books=pending_books.items, total=pending_books.total, page=page,
+                               pagination=pending_books)
 
     @app.route('/admin/approvals/<int:book_id>/approve', methods=['POST'])
     @login_required
@@ -35,9 +44,8 @@ def register_admin_routes(app):
         """Reject a pending library document."""
         book = LibraryBook.query.get_or_404(book_id)
 
-        # Delete the file
-        if os.path.exists(book.file_path):
-            os.remove(book.file_path)
+        # Drop the file reference (unlinked once nothing else uses it)
+        release_upload(book.file_path)
 
         db.session.delete(book)
         db.session.commit()
@@ -136,6 +144,7 @@ def register_admin_routes(app):
                 user.role = 'user'
                 user.pending_role = None
                 db.session.commit()
+                admin_removed()
                 flash(f'Admin access removed from {user.username}.', 'success')
         return redirect(url_for('admin_users'))
 
@@ -162,29 +171,21 @@ def register_admin_routes(app):
             flash('You cannot delete your own account.', 'danger')
         else:
             username = user.username
+            was_admin = user.is_admin()
             db.session.delete(user)
             db.session.commit()
+            if was_admin:
+                admin_removed()
             flash(f'User {username} deleted.', 'success')
         return redirect(url_for('admin_users'))
 
-    def get_clinical_config():
-        config = ClinicalConfig.query.first()
-        if not config:
-            config = ClinicalConfig()
-            db.session.add(config)
-            db.session.commit()
-        return config
-
     @app.route('/admin/clinical/modules', methods=['GET', 'POST'])
     @login_required
     @admin_required
     def admin_clinical_modules():
         """Admin editor for clinical module settings."""
-        import json
-
-        config = get_clinical_config()
-
         if request.method == 'POST':
+            config = get_clinical_config_row()
             doc_types = request.form.getlist('doc_type[]')
             doc_labels = request.form.getlist('doc_label[]')
             doc_requires = request.form.getlist('doc_requires_expiration[]')
@@ -232,16 +233,17 @@ def register_admin_routes(app):
             config.pretest_questions_json = json.dumps(pretest_questions)
             config.posttest_questions_json = json.dumps(posttest_questions)
             db.session.commit()
+            invalidate_clinical_config()
 
             flash('Clinical module settings updated successfully.', 'success')
             return redirect(url_for('admin_clinical_modules'))
 
-        import json
-        documents = json.loads(config.documents_json or '[]')
-        agreements = json.loads(config.agreements_json or '[]')
-        required_course_ids = json.loads(config.required_course_ids_json or '[]')
-        pretest_questions = json.loads(config.pretest_questions_json or '[]')
-        posttest_questions = json.loads(config.posttest_questions_json or '[]')
+        clinical_config = get_clinical_config()
+        documents = clinical_config.documents
+        agreements = clinical_config.agreements
+        required_course_ids = clinical_config.required_course_ids
+        pretest_questions = list(clinical_config.pretest_questions)
+        posttest_questions = list(clinical_config.posttest_questions)
 
         clinical_courses = Course.query.filter_by(category='clinical').all()
 
@@ -258,7 +260,7 @@ def register_admin_routes(app):
     @admin_required
     def admin_clinical_documents():
         """Admin page to approve/reject clinical documents."""
-        pending_docs = LegalDocument.query.filter_by(status='pending').order_by(LegalDocument.uploaded_at.desc()).all()
+        pending_docs = load_profile(LegalDocument.query, 'document_review').filter_by(status='pending').order_by(LegalDocument.uploaded_at.desc()).all()
         return render_template('admin_clinical_documents.html', pending_docs=pending_docs)
 
     @app.route('/admin/clinical/documents/<int:doc_id>/approve', methods=['POST'])
@@ -272,9 +274,7 @@ def register_admin_routes(app):
         db.session.commit()
 
         # Update student profile documents_verified if all required docs are verified
-        config = get_clinical_config()
-        import json
-        required_types = {d['type'] for d in json.loads(config.documents_json or '[]')}
+        required_types = get_clinical_config().required_doc_types
         student_docs = LegalDocument.query.filter_by(student_id=doc.student_id).all()
         verified_types = {d.document_type for d in student_docs if d.status == 'verified'}
         profile = StudentProfile.query.get(doc.student_id)
@@ -301,6 +301,25 @@ def register_admin_routes(app):
         flash('Document rejected.', 'info')
         return redirect(url_for('admin_clinical_documents'))
 
+    @app.route('/admin/perf')
+    @login_required
+    @admin_required
+    def admin_perf():
+        """Per-endpoint SQL aggregates from sampled requests in this worker."""
+        stats = current_app.extensions['perf_stats']
+        return render_template('admin_perf.html', endpoints=stats.snapshot(), since=datetime.fromtimestamp(stats.since),
+                               sample_rate=current_app.config.get('PERF_SAMPLE_RATE', 0),
+                               slow_query_ms=current_app.config.get('PERF_SLOW_QUERY_MS', 200))
+
+    @app.route('/admin/perf/reset', methods=['POST'])
+    @login_required
+    @admin_required
+    def reset_perf():
+        """Clear this worker's SQL aggregates."""
+        current_app.extensions['perf_stats'].reset()
+        flash('Performance statistics cleared.', 'success')
+        return redirect(url_for('admin_perf'))
+
     @app.route('/admin/courses')
     @login_required
     @pemateri_required
@@ -308,10 +327,10 @@ def register_admin_routes(app):
         """Pemateri/Admin page to create and manage courses."""
         # If pemateri (not admin), show only their courses
         if current_user.is_pemateri() and not current_user.is_admin():
-            courses = Course.query.filter_by(instructor_id=current_user.id).all()
+            courses = load_profile(Course.query, 'course_card').filter_by(instructor_id=current_user.id).all()
         else:
             # Admin sees all courses
-            courses = Course.query.all()
+            courses = load_profile(Course.query, 'course_card').all()
         return render_template('admin_courses.html', courses=courses)
 
     @app.route('/admin/courses/create', methods=['GET', 'POST'])
@@ -333,7 +352,7 @@ def register_admin_routes(app):
             if 'thumbnail_image' in request.files:
                 image_file = request.files['thumbnail_image']
                 if image_file and image_file.filename:
-                    image_path = save_upload_image(image_file, subfolder='courses')
+                    image_path = save_upload_image(image_file)
                     if image_path:
                         thumbnail_url = image_path
 
@@ -383,8 +402,9 @@ def register_admin_routes(app):
             if 'thumbnail_image' in request.files:
                 image_file = request.files['thumbnail_image']
                 if image_file and image_file.filename:
-                    image_path = save_upload_image(image_file, subfolder='courses')
+                    image_path = save_upload_image(image_file)
                     if image_path:
+                        release_upload(course.thumbnail_url)
                         course.thumbnail_url = image_path
 
             db.session.commit()
@@ -406,6 +426,12 @@ def register_admin_routes(app):
             return redirect(url_for('admin_courses'))
 
         title = course.title
+        # The cascade deletes modules and materials; drop their image references too
+        release_upload(course.thumbnail_url)
+        for module in course.modules:
+            release_upload(module.image_path)
+            for material in module.materials:
+                release_upload(material.image_path)
         db.session.delete(course)
         db.session.commit()
         flash(f'Course "{title}" deleted successfully.', 'success')
@@ -437,7 +463,7 @@ def register_admin_routes(app):
             if 'image' in request.files:
                 image_file = request.files['image']
                 if image_file and image_file.filename:
-                    image_path = save_upload_image(image_file, subfolder='modules')
+                    image_path = save_upload_image(image_file)
 
             module = CourseModule(
                 course_id=course_id,
@@ -480,7 +506,9 @@ def register_admin_routes(app):
             if 'image' in request.files:
                 image_file = request.files['image']
                 if image_file and image_file.filename:
-                    image_path = save_upload_image(image_file, subfolder='modules')
+                    image_path = save_upload_image(image_file)
+                    if image_path:
+                        release_upload(module.image_path)
                     module.image_path = image_path
 
             module.title = title
@@ -507,6 +535,9 @@ def register_admin_routes(app):
             return redirect(url_for('admin_courses'))
 
         title = module.title
+        release_upload(module.image_path)
+        for material in module.materials:
+            release_upload(material.image_path)
         db.session.delete(module)
         db.session.commit()
 
@@ -545,7 +576,7 @@ def register_admin_routes(app):
             if 'image' in request.files:
                 image_file = request.files['image']
                 if image_file and image_file.filename:
-                    image_path = save_upload_image(image_file, subfolder='materials')
+                    image_path = save_upload_image(image_file)
 
             material = CourseMaterial(
                 module_id=module_id,
@@ -595,7 +626,9 @@ def register_admin_routes(app):
             if 'image' in request.files:
                 image_file = request.files['image']
                 if image_file and image_file.filename:
-                    image_path = save_upload_image(image_file, subfolder='materials')
+                    image_path = save_upload_image(image_file)
+                    if image_path:
+                        release_upload(material.image_path)
                     material.image_path = image_path
 
             material.title = title
@@ -624,6 +657,7 @@ def register_admin_routes(app):
             return redirect(url_for('admin_courses'))
 
         title = material.title
+        release_upload(material.image_path)
         db.session.delete(material)
         db.session.commit()
 
@@ -662,12 +696,14 @@ def register_admin_routes(app):
             }), 400
         
         try:
-            image_path = save_upload_image(file_obj, subfolder='materials')
+            image_path = save_upload_image(file_obj)
             if not image_path:
                 return jsonify({
                     'success': False,
                     'message': 'Failed to save image'
                 }), 400
+            # Keep the blob's reference; the editor's HTML embeds the URL
+            db.session.commit()
             
             return jsonify({
                 'success': True,
@@ -675,6 +711,7 @@ def register_admin_routes(app):
                 'url': image_path
             })
         except Exception as e:
+            db.session.rollback()
             return jsonify({
                 'success': False,
                 'message': f'Upload error: {str(e)}'
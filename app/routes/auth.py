@@ -2,14 +2,17 @@ import os
 from flask import render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
-from models import db, User, Course, CourseEnrollment, News, StudentProfile
+from models import db, User, Course, CourseEnrollment, News
+from app.profile import get_current_profile
+from app.identity import admin_exists, admin_removed
+from app.loading import load_profile
 
 
 def register_auth_routes(app):
     @app.route('/setup-admin', methods=['GET', 'POST'])
     def setup_admin():
         """Create the first admin account on initial launch."""
-        if User.query.filter_by(role='admin').first():
+        if admin_exists():
             return redirect(url_for('login'))
 
         if request.method == 'POST':
@@ -55,9 +58,9 @@ def register_auth_routes(app):
             enrolled_courses = CourseEnrollment.query.filter_by(user_id=current_user.id).count()
             course_total = Course.query.count()
             # Get 3 latest news for carousel
-            latest_news = News.query.order_by(News.created_at.desc()).limit(3).all()
+            latest_news = load_profile(News.query, 'news_card').order_by(News.created_at.desc()).limit(3).all()
             # Get student profile if exists
-            student_profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+            student_profile = get_current_profile()
             return render_template('dashboard.html', 
                                  enrolled_courses=enrolled_courses, 
                                  course_total=course_total, 
@@ -253,5 +256,7 @@ def register_auth_routes(app):
         current_user.role = 'user'
         current_user.pending_role = None
         db.session.commit()
+        if role == 'admin':
+            admin_removed()
         flash('Your access has been revoked.', 'success')
         return redirect(url_for('account_settings'))
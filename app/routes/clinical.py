@@ -1,117 +1,47 @@
 from flask import render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
-from models import (db, User, StudentProfile, LegalDocument, DigitalAgreement, ClinicalConfig,
+from models import (db, User, StudentProfile, LegalDocument, DigitalAgreement,
                     Course, CourseEnrollment, PreClinicalAssessment,
                     LogbookEntry, PatientCase, PatientCaseDailyUpdate,
-                    CompetencyChecklist, CompetencyProgress, DailyJournal,
+                    CompetencyProgress, DailyJournal,
                     WeeklyAssessment, FinalExam, Evaluation360, ClinicalCertificate,
                     IncidentReport, StudentFeedback, AlumniProfile, SupervisorValidationPIN)
 from app.utils import save_upload_image, allowed_file
-from werkzeug.utils import secure_filename
+from app.case_timeline import build_case_timelines, invalidate_case_timeline
+from app.profile import get_current_profile, reset_current_profile, with_profile
+from app.clinical_config import get_clinical_config
+from app.pagination import keyset_paginate, cached_count
+from app.competency import apply_logbook_entry
+from app.storage import store_upload, release_upload
+from app.supervisor import supervisor_rollup, SORT_COLUMNS, DEFAULT_SORT
+from app.sqlite import retry_on_busy
 from datetime import datetime, date, timedelta
-import os
 import json
 
 
-def get_clinical_config():
-    config = ClinicalConfig.query.first()
-    if not config:
-        config = ClinicalConfig(
-            documents_json=json.dumps([
-                {'type': 'referral', 'label': 'Referral Letter', 'requires_expiration': True},
-                {'type': 'health', 'label': 'Health Letter', 'requires_expiration': True},
-                {'type': 'insurance', 'label': 'Insurance', 'requires_expiration': True},
-                {'type': 'integrity_pact', 'label': 'Integrity Pact', 'requires_expiration': False}
-            ]),
-            agreements_json=json.dumps([
-                {'type': 'confidentiality', 'title': 'Confidentiality', 'text': 'I hereby agree to maintain strict patient confidentiality and comply with all data protection regulations...'},
-                {'type': 'ethics', 'title': 'Ethics', 'text': 'I commit to upholding the highest standards of professional ethics in all clinical interactions...'},
-                {'type': 'discipline', 'title': 'Discipline', 'text': 'I acknowledge and accept the disciplinary policies and sanctions outlined by the hospital...'},
-                {'type': 'emergency', 'title': 'Emergency Procedures', 'text': 'I understand the emergency procedures and agree to follow all safety protocols...'}
-            ]),
-            required_course_ids_json=json.dumps([]),
-            pretest_questions_json=json.dumps([
-                {
-                    'id': 1,
-                    'question': 'Which action is most important before touching a patient?',
-                    'options': ['Hand hygiene', 'Adjust bed', 'Write notes', 'Check phone'],
-                    'correct_option': 'Hand hygiene'
-                },
-                {
-                    'id': 2,
-                    'question': 'What should you do if your ID badge is missing?',
-                    'options': ['Report to supervisor', 'Borrow a friend’s badge', 'Ignore it', 'Leave the unit'],
-                    'correct_option': 'Report to supervisor'
-                },
-                {
-                    'id': 3,
-                    'question': 'Which item is part of basic PPE?',
-                    'options': ['Gloves', 'Necklace', 'Perfume', 'Watch'],
-                    'correct_option': 'Gloves'
-                }
-            ]),
-            posttest_questions_json=json.dumps([
-                {
-                    'id': 1,
-                    'question': 'When should you perform hand hygiene?',
-                    'options': ['Before and after patient contact', 'Only after meals', 'Only at shift end', 'Once per day'],
-                    'correct_option': 'Before and after patient contact'
-                },
-                {
-                    'id': 2,
-                    'question': 'Which is the correct way to dispose of sharps?',
-                    'options': ['Place in a sharps container', 'Throw in regular trash', 'Leave on tray', 'Wrap in tissue'],
-                    'correct_option': 'Place in a sharps container'
-                },
-                {
-                    'id': 3,
-                    'question': 'If you witness a safety incident, what is the first step?',
-                    'options': ['Ensure patient safety', 'Post on chat', 'Finish other tasks', 'Ignore it'],
-                    'correct_option': 'Ensure patient safety'
-                }
-            ])
-        )
-        db.session.add(config)
-        db.session.commit()
-
-    documents = json.loads(config.documents_json or '[]')
-    agreements = json.loads(config.agreements_json or '[]')
-    required_course_ids = json.loads(config.required_course_ids_json or '[]')
-    pretest_questions = json.loads(config.pretest_questions_json or '[]')
-    posttest_questions = json.loads(config.posttest_questions_json or '[]')
-
-    return {
-        'config': config,
-        'documents': documents,
-        'agreements': agreements,
-        'required_course_ids': required_course_ids,
-        'pretest_questions': pretest_questions,
-        'posttest_questions': posttest_questions
-    }
-
-
 def register_clinical_routes(app):
     
     # ==================== PRE-CLINICAL ONBOARDING ====================
     
     @app.route('/clinical/onboarding')
     @login_required
+    @with_profile('documents', 'agreements', 'assessments')
     def clinical_onboarding():
         """Pre-clinical onboarding dashboard."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
         
         clinical_config = get_clinical_config()
-        required_doc_types = {d['type'] for d in clinical_config['documents']}
-        required_agreement_types = {a['type'] for a in clinical_config['agreements']}
-        required_course_ids = clinical_config['required_course_ids']
+        required_doc_types = clinical_config.required_doc_types
+        required_agreement_types = clinical_config.required_agreement_types
+        required_course_ids = clinical_config.required_course_ids
 
         # Get progress status
-        legal_docs = LegalDocument.query.filter_by(student_id=profile.id).all()
-        agreements = DigitalAgreement.query.filter_by(student_id=profile.id).all()
+        legal_docs = profile.legal_documents
+        agreements = profile.agreements
         if required_course_ids:
             elearning_courses = Course.query.filter(Course.id.in_(required_course_ids)).all()
         else:
@@ -124,7 +54,7 @@ def register_clinical_routes(app):
             ).count()
         else:
             enrolled_count = 0
-        assessments = PreClinicalAssessment.query.filter_by(student_id=profile.id).all()
+        assessments = profile.preclinical_assessments
         
         # Calculate completion status
         docs_uploaded = len([d for d in legal_docs if d.status in ['verified', 'pending'] and d.document_type in required_doc_types])
@@ -159,7 +89,7 @@ def register_clinical_routes(app):
     @login_required
     def clinical_student_registration():
         """Student profile registration for clinical practice."""
-        existing_profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        existing_profile = get_current_profile()
         
         if request.method == 'POST':
             student_id = request.form.get('student_id')
@@ -193,6 +123,7 @@ def register_clinical_routes(app):
                     practice_end_date=practice_end_date
                 )
                 db.session.add(profile)
+                reset_current_profile()
                 flash('Student profile created successfully!', 'success')
             
             db.session.commit()
@@ -202,15 +133,16 @@ def register_clinical_routes(app):
     
     @app.route('/clinical/documents/upload', methods=['GET', 'POST'])
     @login_required
+    @with_profile('documents')
     def clinical_documents_upload():
         """Upload legal documents."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
         
         clinical_config = get_clinical_config()
-        allowed_doc_types = {d['type'] for d in clinical_config['documents']}
+        allowed_doc_types = clinical_config.required_doc_types
 
         if request.method == 'POST':
             document_type = request.form.get('document_type')
@@ -230,10 +162,7 @@ def register_clinical_routes(app):
                 return redirect(request.url)
             
             if file and allowed_file(file.filename):
-                filename = secure_filename(f"{document_type}_{profile.student_id}_{file.filename}")
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'clinical_documents', filename)
-                os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                file.save(filepath)
+                file_path = store_upload(file)
                 
                 # Check if document already exists
                 existing_doc = LegalDocument.query.filter_by(
@@ -242,7 +171,8 @@ def register_clinical_routes(app):
                 ).first()
                 
                 if existing_doc:
-                    existing_doc.file_path = f'clinical_documents/{filename}'
+                    release_upload(existing_doc.file_path)
+                    existing_doc.file_path = file_path
                     existing_doc.status = 'pending'
                     existing_doc.uploaded_at = datetime.utcnow()
                     if expiration_date:
@@ -251,7 +181,7 @@ def register_clinical_routes(app):
                     document = LegalDocument(
                         student_id=profile.id,
                         document_type=document_type,
-                        file_path=f'clinical_documents/{filename}',
+                        file_path=file_path,
                         status='pending',
                         expiration_date=datetime.strptime(expiration_date, '%Y-%m-%d').date() if expiration_date else None
                     )
@@ -268,7 +198,7 @@ def register_clinical_routes(app):
                 
                 return redirect(url_for('clinical_onboarding'))
         
-        existing_docs = LegalDocument.query.filter_by(student_id=profile.id).all()
+        existing_docs = profile.legal_documents
         return render_template('clinical/documents_upload.html',
                      profile=profile,
                      existing_docs=existing_docs,
@@ -276,25 +206,25 @@ def register_clinical_routes(app):
     
     @app.route('/clinical/agreements/<agreement_type>', methods=['GET', 'POST'])
     @login_required
+    @with_profile('agreements')
     def clinical_agreements(agreement_type):
         """Sign digital agreements."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
         
         clinical_config = get_clinical_config()
-        agreement_texts = {a['type']: a.get('text', '') for a in clinical_config['agreements']}
-        agreement_titles = {a['type']: a.get('title', a['type'].replace('_', ' ').title()) for a in clinical_config['agreements']}
+        agreement_texts = clinical_config.agreement_texts
+        agreement_titles = clinical_config.agreement_titles
 
         if agreement_type not in agreement_texts:
             flash('Agreement not found.', 'danger')
             return redirect(url_for('clinical_onboarding'))
         
-        existing_agreement = DigitalAgreement.query.filter_by(
-            student_id=profile.id,
-            agreement_type=agreement_type
-        ).first()
+        existing_agreement = next(
+            (a for a in profile.agreements if a.agreement_type == agreement_type), None
+        )
         
         if request.method == 'POST':
             if existing_agreement and existing_agreement.signed:
@@ -347,7 +277,7 @@ def register_clinical_routes(app):
     @login_required
     def clinical_elearning():
         """E-learning modules list."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
@@ -377,9 +307,10 @@ def register_clinical_routes(app):
     
     @app.route('/clinical/assessment/<assessment_type>', methods=['GET', 'POST'])
     @login_required
+    @with_profile('assessments')
     def clinical_assessment(assessment_type):
         """Pre-test or post-test assessment."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
@@ -407,18 +338,31 @@ def register_clinical_routes(app):
             return redirect(url_for('clinical_elearning'))
         
         # Get previous attempts
-        previous_attempts = PreClinicalAssessment.query.filter_by(
-            student_id=profile.id,
-            assessment_type=assessment_type
-        ).order_by(PreClinicalAssessment.taken_at.desc()).all()
+        previous_attempts = sorted(
+            (a for a in profile.preclinical_assessments if a.assessment_type == assessment_type),
+            key=lambda a: a.taken_at,
+            reverse=True
+        )
         
         passed_attempt = next((a for a in previous_attempts if a.passed), None)
         
         if request.method == 'POST':
             # Process assessment submission
             answers_data = request.form.get('answers_json', '{}')
-            correct_answers = request.form.get('correct_answers', 0, type=int)
-            total_questions = request.form.get('total_questions', 50, type=int)
+            answer_key = clinical_config.answer_keys.get(assessment_type)
+            if answer_key:
+                # Score against the configured answer key rather than trusting the client count
+                try:
+                    answers = json.loads(answers_data or '{}')
+                except json.JSONDecodeError:
+                    answers = {}
+                if not isinstance(answers, dict):
+                    answers = {}
+                correct_answers = sum(1 for qid, correct in answer_key.items() if answers.get(qid) == correct)
+                total_questions = len(clinical_config.questions_for(assessment_type))
+            else:
+                correct_answers = request.form.get('correct_answers', 0, type=int)
+                total_questions = request.form.get('total_questions', 50, type=int)
             score = int((correct_answers / total_questions) * 100)
             passing_score = 80
             passed = score >= passing_score
@@ -451,11 +395,7 @@ def register_clinical_routes(app):
             
             return redirect(url_for('clinical_onboarding'))
         
-        clinical_config = get_clinical_config()
-        if assessment_type == 'pretest':
-            sample_questions = clinical_config['pretest_questions']
-        else:
-            sample_questions = clinical_config['posttest_questions']
+        sample_questions = clinical_config.questions_for(assessment_type)
 
         if not sample_questions:
             sample_questions = [
@@ -475,23 +415,25 @@ def register_clinical_routes(app):
     @login_required
     def clinical_logbook():
         """Digital logbook dashboard."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
         
         # Get logbook entries
         page = request.args.get('page', 1, type=int)
-        entries = LogbookEntry.query.filter_by(student_id=profile.id).order_by(
-            LogbookEntry.entry_date.desc()
-        ).paginate(page=page, per_page=20)
+        entries = keyset_paginate(LogbookEntry.query.filter_by(student_id=profile.id), LogbookEntry,
+                                  LogbookEntry.entry_date, page=page, per_page=20,
+                                  after=request.args.get('after'), before=request.args.get('before'),
+                                  count_key=('student', profile.id))
         
         # Get competency progress
         competencies = CompetencyProgress.query.filter_by(student_id=profile.id).all()
         
         # Statistics
-        total_entries = LogbookEntry.query.filter_by(student_id=profile.id).count()
-        validated_entries = LogbookEntry.query.filter_by(student_id=profile.id, validated=True).count()
+        total_entries = entries.total
+        validated_entries = cached_count(LogbookEntry.query.filter_by(student_id=profile.id, validated=True),
+                                         LogbookEntry, ('student_validated', profile.id))
         pending_validation = total_entries - validated_entries
         
         return render_template('clinical/logbook.html',
@@ -504,9 +446,10 @@ def register_clinical_routes(app):
     
     @app.route('/clinical/logbook/add', methods=['GET', 'POST'])
     @login_required
+    @retry_on_busy
     def clinical_logbook_add():
         """Add new logbook entry."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
@@ -533,40 +476,9 @@ def register_clinical_routes(app):
                 learning_points=learning_points
             )
             db.session.add(entry)
+            apply_logbook_entry(profile, procedure_name, role)
             db.session.commit()
             
-            # Update competency progress if applicable
-            competency = CompetencyChecklist.query.filter_by(
-                program=profile.program,
-                competency_name=procedure_name
-            ).first()
-            
-            if competency:
-                progress = CompetencyProgress.query.filter_by(
-                    student_id=profile.id,
-                    competency_id=competency.id
-                ).first()
-                
-                if not progress:
-                    progress = CompetencyProgress(student_id=profile.id, competency_id=competency.id)
-                    db.session.add(progress)
-                
-                if role == 'observe':
-                    progress.observations_count += 1
-                elif role == 'assist':
-                    progress.assists_count += 1
-                elif role == 'independent':
-                    progress.independent_count += 1
-                
-                # Auto-update competency level
-                if (progress.observations_count >= competency.minimum_observations and
-                    progress.assists_count >= competency.minimum_assists and
-                    progress.independent_count >= competency.minimum_independent):
-                    if progress.competency_level == 'not_yet':
-                        progress.competency_level = 'competent'
-                
-                db.session.commit()
-            
             flash('Logbook entry added successfully! Awaiting supervisor validation.', 'success')
             return redirect(url_for('clinical_logbook'))
         
@@ -579,7 +491,7 @@ def register_clinical_routes(app):
         entry = LogbookEntry.query.get_or_404(entry_id)
         
         # Check permission
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if entry.student_id != profile.id and entry.supervisor_id != current_user.id and not current_user.is_admin():
             flash('You do not have permission to view this entry.', 'danger')
             return redirect(url_for('clinical_logbook'))
@@ -588,6 +500,7 @@ def register_clinical_routes(app):
     
     @app.route('/clinical/logbook/<int:entry_id>/validate', methods=['POST'])
     @login_required
+    @retry_on_busy
     def clinical_logbook_validate(entry_id):
         """Supervisor validates logbook entry."""
         entry = LogbookEntry.query.get_or_404(entry_id)
@@ -624,7 +537,7 @@ def register_clinical_routes(app):
     @login_required
     def clinical_cases():
         """List patient cases for long-term learning."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
@@ -633,48 +546,10 @@ def register_clinical_routes(app):
             PatientCase.updated_at.desc()
         ).all()
 
-        last_update_map = {}
-        case_tree_map = {}
-        for case in cases:
-            latest_update = PatientCaseDailyUpdate.query.filter_by(case_id=case.id).order_by(
-                PatientCaseDailyUpdate.entry_date.desc()
-            ).first()
-            last_update_map[case.id] = latest_update.entry_date if latest_update else None
+        case_tree_map, last_update_map = build_case_timelines(cases)
 
-            updates = PatientCaseDailyUpdate.query.filter_by(case_id=case.id).order_by(
-                PatientCaseDailyUpdate.entry_date.asc()
-            ).all()
-
-            nodes = []
-            nodes.append({
-                'label': 'Day 1',
-                'date': case.start_date,
-                'status': 'Start',
-                'summary': case.initial_diagnosis or case.initial_notes
-            })
-
-            for update in updates:
-                day_number = (update.entry_date - case.start_date).days + 1
-                nodes.append({
-                    'label': f'Day {day_number}',
-                    'date': update.entry_date,
-                    'status': update.status or 'Update',
-                    'summary': update.update_summary
-                })
-
-            if case.status == 'closed':
-                closed_date = case.end_date or (updates[-1].entry_date if updates else case.updated_at.date())
-                nodes.append({
-                    'label': 'Done',
-                    'date': closed_date,
-                    'status': 'Closed',
-                    'summary': None
-                })
-
-            case_tree_map[case.id] = nodes
-
-        active_count = PatientCase.query.filter_by(student_id=profile.id, status='active').count()
-        closed_count = PatientCase.query.filter_by(student_id=profile.id, status='closed').count()
+        active_count = sum(1 for case in cases if case.status == 'active')
+        closed_count = sum(1 for case in cases if case.status == 'closed')
 
         return render_template('clinical/cases_list.html',
                  profile=profile,
@@ -688,7 +563,7 @@ def register_clinical_routes(app):
     @login_required
     def clinical_cases_add():
         """Add a new patient case."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
@@ -724,7 +599,7 @@ def register_clinical_routes(app):
     def clinical_case_detail(case_id):
         """View patient case details and daily updates."""
         patient_case = PatientCase.query.get_or_404(case_id)
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
 
         if not profile:
             flash('Please complete your student profile first.', 'warning')
@@ -745,10 +620,11 @@ def register_clinical_routes(app):
 
     @app.route('/clinical/cases/<int:case_id>/update', methods=['POST'])
     @login_required
+    @retry_on_busy
     def clinical_case_update(case_id):
         """Add a daily update to a patient case."""
         patient_case = PatientCase.query.get_or_404(case_id)
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
 
         if not profile:
             flash('Please complete your student profile first.', 'warning')
@@ -789,7 +665,10 @@ def register_clinical_routes(app):
             next_control_date=next_control_date
         )
         db.session.add(update)
+        # Touch the case so cached timelines in every worker see a new version
+        patient_case.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_case_timeline(patient_case.id)
 
         flash('Daily update added successfully.', 'success')
         return redirect(url_for('clinical_case_detail', case_id=patient_case.id))
@@ -799,7 +678,7 @@ def register_clinical_routes(app):
     def clinical_case_close(case_id):
         """Close a patient case when finished."""
         patient_case = PatientCase.query.get_or_404(case_id)
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
 
         if not profile:
             flash('Please complete your student profile first.', 'warning')
@@ -815,6 +694,7 @@ def register_clinical_routes(app):
         patient_case.status = 'closed'
         patient_case.end_date = close_date
         db.session.commit()
+        invalidate_case_timeline(patient_case.id)
 
         flash('Case closed successfully.', 'success')
         return redirect(url_for('clinical_case_detail', case_id=patient_case.id))
@@ -825,23 +705,25 @@ def register_clinical_routes(app):
     @login_required
     def clinical_journal():
         """Daily reflection journal list."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
         
         page = request.args.get('page', 1, type=int)
-        journals = DailyJournal.query.filter_by(student_id=profile.id).order_by(
-            DailyJournal.entry_date.desc()
-        ).paginate(page=page, per_page=15)
+        journals = keyset_paginate(DailyJournal.query.filter_by(student_id=profile.id), DailyJournal,
+                                   DailyJournal.entry_date, page=page, per_page=15,
+                                   after=request.args.get('after'), before=request.args.get('before'),
+                                   count_key=('student', profile.id))
         
         return render_template('clinical/journal_list.html', profile=profile, journals=journals)
     
     @app.route('/clinical/journal/add', methods=['GET', 'POST'])
     @login_required
+    @retry_on_busy
     def clinical_journal_add():
         """Add daily journal entry."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
@@ -897,32 +779,25 @@ def register_clinical_routes(app):
             flash('Access denied. Supervisor privileges required.', 'danger')
             return redirect(url_for('index'))
         
-        # Get supervised students
-        students = StudentProfile.query.filter_by(supervisor_id=current_user.id).all()
+        sort = request.args.get('sort', DEFAULT_SORT)
+        if sort not in SORT_COLUMNS:
+            sort = DEFAULT_SORT
+        direction = 'asc' if request.args.get('dir') == 'asc' else 'desc'
         
-        # Get pending validations
-        pending_logbook = LogbookEntry.query.filter(
-            LogbookEntry.student_id.in_([s.id for s in students]),
-            LogbookEntry.validated == False
-        ).count()
+        # One row per supervised student, aggregated in a single query
+        students = supervisor_rollup(current_user.id, sort=sort, descending=(direction == 'desc'))
         
-        # Get journals needing feedback
-        journals_no_feedback = DailyJournal.query.filter(
-            DailyJournal.student_id.in_([s.id for s in students]),
-            DailyJournal.supervisor_feedback.is_(None)
-        ).count()
-        
-        # Get incident reports
-        incidents = IncidentReport.query.filter(
-            IncidentReport.student_id.in_([s.id for s in students]),
-            IncidentReport.status != 'closed'
-        ).all()
+        pending_logbook = sum(s.pending_validations for s in students)
+        journals_no_feedback = sum(s.journals_awaiting for s in students)
+        open_incidents = sum(s.open_incidents for s in students)
         
         return render_template('clinical/supervisor_dashboard.html',
                              students=students,
                              pending_logbook=pending_logbook,
                              journals_no_feedback=journals_no_feedback,
-                             incidents=incidents)
+                             open_incidents=open_incidents,
+                             sort=sort,
+                             direction=direction)
     
     @app.route('/clinical/supervisor/student/<int:student_profile_id>')
     @login_required
@@ -970,7 +845,7 @@ def register_clinical_routes(app):
             description = request.form.get('description')
             immediate_action = request.form.get('immediate_action')
             
-            profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+            profile = get_current_profile()
             
             incident = IncidentReport(
                 reporter_id=current_user.id,
@@ -997,7 +872,7 @@ def register_clinical_routes(app):
     @login_required
     def clinical_exam(exam_type):
         """Final examinations."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
@@ -1021,7 +896,7 @@ def register_clinical_routes(app):
     @login_required
     def evaluation_360():
         """360-degree evaluation overview."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
@@ -1049,7 +924,7 @@ def register_clinical_routes(app):
     @login_required
     def clinical_feedback():
         """Submit feedback on hospital and program."""
-        profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+        profile = get_current_profile()
         if not profile:
             flash('Please complete your student profile first.', 'warning')
             return redirect(url_for('clinical_student_registration'))
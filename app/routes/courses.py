@@ -1,11 +1,69 @@
-from flask import render_template, request, redirect, url_for, flash
+from flask import render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
-from models import db, Course, CourseModule, CourseMaterial, AttendanceLog, CourseEnrollment, MaterialComment, MaterialSubmission
-from app.utils import get_course_attendance_today, save_upload_image, allowed_file
+from models import (db, User, Course, CourseModule, CourseMaterial, AttendanceLog, CourseEnrollment, MaterialComment,
+                    MaterialSubmission)
+from app.utils import save_upload_image, allowed_file, pemateri_required
+from app.attendance import attendance_day, has_attended, mark_attendance
+from app.checkin import checkin_buffer, make_checkin_token, verify_checkin_token
+from app.search import apply_search
+from app.pagination import keyset_paginate
+from app.conditional import conditional_view
+from app.loading import load_profile
+from app.sqlite import retry_on_busy
+from sqlalchemy import func
 from werkzeug.utils import secure_filename
 import os
 
 
+def _course_detail_version(course_id):
+    """Course, instructor name, module and material changes and today's attendance, in one query."""
+    in_course = CourseModule.course_id == course_id
+    row = db.session.execute(
+        db.select(
+            Course.updated_at,
+            User.username,
+            Course.module_count,
+            db.select(func.max(CourseModule.updated_at)).where(in_course).scalar_subquery(),
+            db.select(func.sum(CourseModule.material_count)).where(in_course).scalar_subquery(),
+            db.select(func.max(CourseMaterial.updated_at)).join(CourseMaterial.module).where(in_course).scalar_subquery(),
+            db.select(AttendanceLog.id).where(
+                AttendanceLog.user_id == current_user.id,
+                AttendanceLog.course_id == course_id,
+                AttendanceLog.attendance_date == attendance_day()
+            ).exists(),
+        )
+        .join(User, User.id == Course.instructor_id)
+        .where(Course.id == course_id)
+    ).first()
+    if row is None:
+        return None
+    return tuple(row) + (checkin_buffer.contains(current_user.id, course_id),)
+
+
+def _material_detail_version(material_id):
+    """Material, its module and course, comments and the viewer's submission, in one query."""
+    on_material = MaterialComment.material_id == material_id
+    row = db.session.execute(
+        db.select(
+            CourseMaterial.updated_at,
+            CourseModule.updated_at,
+            Course.updated_at,
+            User.username,
+            CourseMaterial.comment_count,
+            db.select(func.max(MaterialComment.updated_at)).where(on_material).scalar_subquery(),
+            db.select(MaterialSubmission.updated_at).where(
+                MaterialSubmission.material_id == material_id,
+                MaterialSubmission.user_id == current_user.id
+            ).scalar_subquery(),
+        )
+        .join(CourseModule, CourseModule.id == CourseMaterial.module_id)
+        .join(Course, Course.id == CourseModule.course_id)
+        .join(User, User.id == Course.instructor_id)
+        .where(CourseMaterial.id == material_id)
+    ).first()
+    return tuple(row) if row else None
+
+
 def register_course_routes(app):
     @app.route('/courses')
     @login_required
@@ -15,28 +73,33 @@ def register_course_routes(app):
         search = request.args.get('search', '')
         category = request.args.get('category', '')
 
-        query = Course.query
+        query = load_profile(Course.query, 'course_card')
 
         if search:
-            query = query.filter(Course.title.ilike(f'%{search}%') | Course.description.ilike(f'%{search}%'))
+            query = apply_search(query, Course, search, Course.title, Course.description)
 
         if category:
             query = query.filter_by(category=category)
 
-        courses_paginated = query.paginate(page=page, per_page=12)
+        courses_paginated = keyset_paginate(query, Course, None if search else Course.created_at,
+                                            page=page, per_page=12,
+                                            after=request.args.get('after'), before=request.args.get('before'),
+                                            count_key=(category, search))
 
         return render_template('courses.html',
                                courses=courses_paginated.items,
                                total=courses_paginated.total,
                                page=page,
                                search=search,
-                               category=category)
+                               category=category,
+                               pagination=courses_paginated)
 
     @app.route('/course/<int:course_id>')
     @login_required
+    @conditional_view(_course_detail_version)
     def course_detail(course_id):
         """Display course detail with Spada-like layout (sidebar + content)."""
-        course = Course.query.get_or_404(course_id)
+        course = load_profile(Course.query, 'course_card').filter_by(id=course_id).first_or_404()
 
         # Get all modules for this course (ordered by order_index)
         modules = CourseModule.query.filter_by(course_id=course_id).order_by(CourseModule.order_index).all()
@@ -52,7 +115,8 @@ def register_course_routes(app):
             materials = CourseMaterial.query.filter_by(module_id=selected_module.id).all()
 
         # Check attendance for today
-        attendance_today = get_course_attendance_today(current_user.id, course_id)
+        attendance_today = (checkin_buffer.contains(current_user.id, course_id)
+                            or has_attended(current_user.id, course_id))
 
         # Note: descriptions are already sanitized when stored in DB, no need to re-sanitize
         course_description_html = course.description or ''
@@ -69,6 +133,7 @@ def register_course_routes(app):
 
     @app.route('/course/<int:course_id>/enroll', methods=['POST'])
     @login_required
+    @retry_on_busy
     def enroll_course(course_id):
         """Enroll user in a course."""
         course = Course.query.get_or_404(course_id)
@@ -91,29 +156,78 @@ def register_course_routes(app):
 
     @app.route('/course/<int:course_id>/attendance', methods=['POST'])
     @login_required
+    @retry_on_busy
     def submit_attendance(course_id):
         """Mark attendance for a course."""
         course = Course.query.get_or_404(course_id)
 
-        # Check if already marked today
-        attendance_today = get_course_attendance_today(current_user.id, course_id)
+        marked = mark_attendance(current_user.id, course_id)
+        db.session.commit()
 
-        if attendance_today:
-            flash('You have already marked attendance for this course today.', 'info')
-        else:
-            attendance = AttendanceLog(
-                user_id=current_user.id,
-                course_id=course_id,
-                status='present'
-            )
-            db.session.add(attendance)
-            db.session.commit()
+        if marked:
             flash('Attendance marked successfully!', 'success')
+        else:
+            flash('You have already marked attendance for this course today.', 'info')
+
+        return redirect(url_for('course_detail', course_id=course_id))
+
+    @app.route('/course/<int:course_id>/checkin-session')
+    @login_required
+    @pemateri_required
+    def checkin_session(course_id):
+        """Instructor screen showing the rotating check-in QR code."""
+        course = Course.query.get_or_404(course_id)
+        if not current_user.is_admin() and course.instructor_id != current_user.id:
+            flash('You do not have permission to run check-in for this course.', 'danger')
+            return redirect(url_for('course_detail', course_id=course_id))
+
+        return render_template('course_checkin.html',
+                               course=course,
+                               token=make_checkin_token(course_id),
+                               period=app.config['CHECKIN_TOKEN_PERIOD'])
+
+    @app.route('/course/<int:course_id>/checkin-token')
+    @login_required
+    @pemateri_required
+    def checkin_token(course_id):
+        """Current check-in token and URL, polled by the check-in screen."""
+        course = Course.query.get_or_404(course_id)
+        if not current_user.is_admin() and course.instructor_id != current_user.id:
+            return jsonify({'success': False, 'message': 'Permission denied.'}), 403
+
+        token = make_checkin_token(course_id)
+        return jsonify({
+            'success': True,
+            'token': token,
+            'url': url_for('course_checkin', course_id=course_id, t=token, _external=True)
+        })
+
+    @app.route('/course/<int:course_id>/checkin', methods=['GET', 'POST'])
+    @login_required
+    def course_checkin(course_id):
+        """Check in by scanning the course QR code.
+
+        The token is verified from its HMAC alone and the check-in is buffered
+        for a batched insert, so this endpoint does no database work.
+        """
+        wants_json = request.is_json or request.accept_mimetypes.best == 'application/json'
+
+        if not verify_checkin_token(course_id, request.values.get('t')):
+            if wants_json:
+                return jsonify({'success': False, 'message': 'This check-in code has expired.'}), 400
+            flash('This check-in code has expired. Please scan the current code.', 'danger')
+            return redirect(url_for('course_detail', course_id=course_id))
+
+        checkin_buffer.add(current_user.id, course_id)
 
+        if wants_json:
+            return jsonify({'success': True, 'message': 'Attendance recorded.'})
+        flash('Attendance marked successfully!', 'success')
         return redirect(url_for('course_detail', course_id=course_id))
 
     @app.route('/material/<int:material_id>')
     @login_required
+    @conditional_view(_material_detail_version)
     def material_detail(material_id):
         """Display material detail with comments and submissions."""
         material = CourseMaterial.query.get_or_404(material_id)
@@ -121,7 +235,7 @@ def register_course_routes(app):
         course = module.course
 
         # Get all comments for this material (ordered by newest first)
-        comments = MaterialComment.query.filter_by(material_id=material_id).order_by(MaterialComment.created_at.desc()).all()
+        comments = load_profile(MaterialComment.query, 'comment_thread').filter_by(material_id=material_id).order_by(MaterialComment.created_at.desc()).all()
 
         # Get user's submission if exists (for assignment type)
         user_submission = None
@@ -140,6 +254,7 @@ def register_course_routes(app):
 
     @app.route('/material/<int:material_id>/comment', methods=['POST'])
     @login_required
+    @retry_on_busy
     def add_comment(material_id):
         """Add a comment to a material."""
         material = CourseMaterial.query.get_or_404(material_id)
@@ -190,7 +305,7 @@ def register_course_routes(app):
             file = request.files['submission_file']
             if file and file.filename:
                 # Save the file
-                file_path = save_upload_image(file, subfolder='submissions')
+                file_path = save_upload_image(file)
 
         # At least one of text or file must be provided
         if not text_content and not file_path:
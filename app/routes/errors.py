@@ -1,5 +1,7 @@
 from flask import render_template
+from sqlalchemy.exc import OperationalError
 from models import db
+from app.sqlite import WriteQueueTimeout, is_busy_error
 
 
 def register_error_handlers(app):
@@ -13,3 +15,12 @@ def register_error_handlers(app):
         """Handle 500 errors."""
         db.session.rollback()
         return render_template('500.html'), 500
+
+    @app.errorhandler(OperationalError)
+    @app.errorhandler(WriteQueueTimeout)
+    def database_busy(error):
+        """Ask the client to retry when the database stayed locked."""
+        if not is_busy_error(error):
+            raise error
+        db.session.rollback()
+        return render_template('500.html'), 503, {'Retry-After': '1'}
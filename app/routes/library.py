@@ -1,28 +1,47 @@
 import os
-from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash, send_file, current_app
+from flask import render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
+from sqlalchemy import func
 from models import db, LibraryBook
 from app.utils import allowed_file
+from app.search import apply_search
+from app.pagination import keyset_paginate
+from app.storage import store_upload
+from app.delivery import send_upload
+from app.conditional import conditional_view
+from app.loading import load_profile
+
+
+def _library_version():
+    """Count and latest change of approved documents: any approval, edit or removal changes it."""
+    return tuple(db.session.execute(
+        db.select(func.count(LibraryBook.id), func.max(LibraryBook.updated_at))
+        .where(LibraryBook.status == 'approved')
+    ).one())
 
 
 def register_library_routes(app):
     @app.route('/library')
     @login_required
+    @conditional_view(_library_version)
     def library():
         """Display approved library documents with search functionality."""
         page = request.args.get('page', 1, type=int)
         search = request.args.get('search', '')
 
-        query = LibraryBook.query.filter_by(status='approved')
+        query = load_profile(LibraryBook.query, 'library_card').filter_by(status='approved')
 
         if search:
-            query = query.filter(LibraryBook.title.ilike(f'%{search}%') | LibraryBook.description.ilike(f'%{search}%'))
+            query = apply_search(query, LibraryBook, search, LibraryBook.title, LibraryBook.description)
+            query = query.order_by(LibraryBook.created_at.desc())
 
-        books = query.order_by(LibraryBook.created_at.desc()).paginate(page=page, per_page=12)
+        books = keyset_paginate(query, LibraryBook, None if search else LibraryBook.created_at,
+                                page=page, per_page=12,
+                                after=request.args.get('after'), before=request.args.get('before'),
+                                count_key=('approved', search))
 
-        return render_template('library.html', books=books.items, total=books.total, page=page, search=search)
+        return render_template('library.html', books=books.items, total=books.total, page=page, search=search,
+                               pagination=books)
 
     @app.route('/library/upload', methods=['POST'])
     @login_required
@@ -49,12 +68,8 @@ def register_library_routes(app):
             return redirect(url_for('library'))
 
         try:
-            # Save file with secure filename
-            filename = secure_filename(file.filename)
-            timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S_')
-            filename = timestamp + filename
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
+            # Store by content; re-uploading the same document reuses the existing file
+            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], store_upload(file))
 
             # Create library book entry (pending status)
             book = LibraryBook(
@@ -103,13 +118,8 @@ def register_library_routes(app):
             flash('This document has been rejected.', 'danger')
             return redirect(url_for('library'))
 
-        # Verify file exists
-        if not os.path.exists(book.file_path):
-            flash('File not found.', 'danger')
-            return redirect(url_for('library'))
-
         try:
-            return send_file(
+            response = send_upload(
                 book.file_path,
                 as_attachment=True,
                 download_name=f"{book.title}_{book.id}.{book.file_path.rsplit('.', 1)[1]}"
@@ -118,6 +128,11 @@ def register_library_routes(app):
             flash(f'Error downloading file: {str(e)}', 'danger')
             return redirect(url_for('library'))
 
+        if response is None:
+            flash('File not found.', 'danger')
+            return redirect(url_for('library'))
+        return response
+
     @app.route('/library/<int:book_id>/view')
     @login_required
     def view_document(book_id):
@@ -132,14 +147,10 @@ def register_library_routes(app):
             flash('This document has been rejected.', 'danger')
             return redirect(url_for('library'))
 
-        # Verify file exists
-        if not os.path.exists(book.file_path):
-            flash('File not found.', 'danger')
-            return redirect(url_for('library'))
-
         try:
-            # Return file with inline disposition for browser preview
-            return send_file(
+            # Return file with inline disposition for browser preview;
+            # Range support lets the PDF viewer fetch pages incrementally
+            response = send_upload(
                 book.file_path,
                 as_attachment=False,  # Display inline, not download
                 download_name=f"{book.title}_{book.id}.{book.file_path.rsplit('.', 1)[1]}"
@@ -147,3 +158,8 @@ def register_library_routes(app):
         except Exception as e:
             flash(f'Error viewing file: {str(e)}', 'danger')
             return redirect(url_for('library'))
+
+        if response is None:
+            flash('File not found.', 'danger')
+            return redirect(url_for('library'))
+        return response
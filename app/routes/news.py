@@ -1,10 +1,23 @@
-import os
 from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash, current_app
+from flask import render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
-from models import db, News
+from models import db, News, User
 from app.utils import allowed_file
+from app.search import apply_search
+from app.pagination import keyset_paginate
+from app.storage import store_upload, release_upload
+from app.conditional import conditional_view
+from app.loading import load_profile
+
+
+def _news_detail_version(id):
+    """The article's updated_at and author name, or None if it does not exist."""
+    row = db.session.execute(
+        db.select(News.updated_at, User.username)
+        .join(User, User.id == News.author_id)
+        .where(News.id == id)
+    ).first()
+    return tuple(row) if row else None
 
 
 def register_news_routes(app):
@@ -15,17 +28,23 @@ def register_news_routes(app):
         page = request.args.get('page', 1, type=int)
         search = request.args.get('search', '')
 
-        query = News.query
+        query = load_profile(News.query, 'news_card')
 
         if search:
-            query = query.filter(News.title.ilike(f'%{search}%') | News.content.ilike(f'%{search}%'))
+            query = apply_search(query, News, search, News.title, News.content)
+            query = query.order_by(News.created_at.desc())
 
-        news_articles = query.order_by(News.created_at.desc()).paginate(page=page, per_page=12)
+        news_articles = keyset_paginate(query, News, None if search else News.created_at,
+                                        page=page, per_page=12,
+                                        after=request.args.get('after'), before=request.args.get('before'),
+                                        count_key=('all', search))
 
-        return render_template('news.html', news_articles=news_articles.items, total=news_articles.total, page=page, search=search)
+        return render_template('news.html', news_articles=news_articles.items, total=news_articles.total, page=page, search=search,
+                               pagination=news_articles)
 
     @app.route('/news/<int:id>')
     @login_required
+    @conditional_view(_news_detail_version)
     def news_detail(id):
         """Display single news article."""
         article = News.query.get_or_404(id)
@@ -39,7 +58,7 @@ def register_news_routes(app):
             flash('Access denied. Admin privileges required.', 'danger')
             return redirect(url_for('index'))
 
-        news_articles = News.query.order_by(News.created_at.desc()).all()
+        news_articles = load_profile(News.query, 'news_card').order_by(News.created_at.desc()).all()
         return render_template('admin_news.html', news_articles=news_articles)
 
     @app.route('/admin/news/create', methods=['GET', 'POST'])
@@ -66,13 +85,7 @@ def register_news_routes(app):
                     # Check if file is an image
                     allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
                     if '.' in file.filename and file.filename.rsplit('.', 1)[1].lower() in allowed_extensions:
-                        filename = secure_filename(file.filename)
-                        # Create unique filename with timestamp
-                        unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-                        upload_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'news')
-                        os.makedirs(upload_folder, exist_ok=True)
-                        file.save(os.path.join(upload_folder, unique_filename))
-                        image_path = f'news/{unique_filename}'
+                        image_path = store_upload(file)
                     else:
                         flash('Invalid image format. Allowed: PNG, JPG, JPEG, GIF, WEBP', 'danger')
                         return redirect(url_for('admin_create_news'))
@@ -116,18 +129,9 @@ def register_news_routes(app):
                 if file and file.filename:
                     allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
                     if '.' in file.filename and file.filename.rsplit('.', 1)[1].lower() in allowed_extensions:
-                        # Delete old image if exists
-                        if article.image_path:
-                            old_path = os.path.join(current_app.config['UPLOAD_FOLDER'], article.image_path)
-                            if os.path.exists(old_path):
-                                os.remove(old_path)
-                        
-                        filename = secure_filename(file.filename)
-                        unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-                        upload_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'news')
-                        os.makedirs(upload_folder, exist_ok=True)
-                        file.save(os.path.join(upload_folder, unique_filename))
-                        article.image_path = f'news/{unique_filename}'
+                        # Release old image if exists
+                        release_upload(article.image_path)
+                        article.image_path = store_upload(file)
 
             article.title = title
             article.content = content
@@ -149,11 +153,8 @@ def register_news_routes(app):
 
         article = News.query.get_or_404(id)
         
-        # Delete image file if exists
-        if article.image_path:
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], article.image_path)
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        # Release image file if exists
+        release_upload(article.image_path)
 
         db.session.delete(article)
         db.session.commit()
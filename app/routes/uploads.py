@@ -1,6 +1,7 @@
-import os
-from flask import send_from_directory, current_app, abort
+from flask import abort, request
 from flask_login import login_required
+from app.delivery import send_upload
+from app.signed_urls import ASSET_PREFIX, remaining_validity, verify_asset_signature
 
 
 def register_upload_routes(app):
@@ -8,9 +9,30 @@ def register_upload_routes(app):
     @login_required
     def uploaded_file(filename):
         """Serve uploaded files from the uploads folder (login required)."""
-        upload_folder = current_app.config.get('UPLOAD_FOLDER')
-        if not upload_folder:
+        response = send_upload(filename)
+        if response is None:
             abort(404)
-        if not os.path.exists(os.path.join(upload_folder, filename)):
+        return response
+
+    @app.route(ASSET_PREFIX + '<path:filename>')
+    def signed_asset(filename):
+        """Serve an upload through a signed URL minted by asset_url().
+
+        The signature replaces the login check, so neither the session nor
+        the user is loaded. The response may be cached by the browser and
+        shared proxies until the URL expires.
+        """
+        expires = request.args.get('e')
+        if not verify_asset_signature(filename, expires, request.args.get('s')):
+            abort(403)
+
+        response = send_upload(filename)
+        if response is None:
             abort(404)
-        return send_from_directory(upload_folder, filename)
+
+        response.cache_control.private = None
+        response.cache_control.public = True
+        if response.cache_control.immutable:
+            response.cache_control.max_age = remaining_validity(expires)
+            response.expires = int(expires)
+        return response
@@ -0,0 +1,65 @@
+import time
+from flask import request, session
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from models import db
+from app.dialect import engine_options
+from app.sqlite import apply_sqlite_profile
+
+# Methods whose requests are served from the read engine
+_READ_METHODS = {'GET', 'HEAD'}
+_STICKY_KEY = '_primary_until'
+
+
+def _read_engine(app):
+    """Engine for read-only requests, or None to keep everything on the primary.
+
+    A replica from DATABASE_READ_URL if set; for SQLite, read-only connections
+    to the primary's file (in WAL mode they never wait for the writer).
+    """
+    read_url = app.config.get('DATABASE_READ_URL')
+    if read_url:
+        engine = create_engine(read_url, **engine_options(read_url))
+        if engine.dialect.name == 'sqlite':
+            apply_sqlite_profile(app, engine, read_only=True)
+        return engine
+
+    with app.app_context():
+        primary = db.engine
+    if primary.dialect.name != 'sqlite' or primary.url.database in (None, '', ':memory:'):
+        return None
+    url = make_url(f'sqlite:///file:{primary.url.database}').update_query_dict({'mode': 'ro', 'uri': 'true'})
+    engine = create_engine(url)
+    apply_sqlite_profile(app, engine, read_only=True)
+    return engine
+
+
+def init_read_routing(app):
+    """Send GET/HEAD requests' queries to the read engine, writes to the primary.
+
+    A request stays on the read engine until it flushes or issues DML (see
+    RoutingSession). After a request that wrote, the same browser session
+    reads from the primary for READ_YOUR_WRITES_WINDOW seconds, so a
+    redirect after POST never shows a replica that has not caught up.
+    """
+    if not app.config.get('READ_ROUTING'):
+        return
+    engine = _read_engine(app)
+    if engine is None:
+        return
+    app.extensions['read_engine'] = engine
+    window = app.config.get('READ_YOUR_WRITES_WINDOW', 5)
+
+    @app.before_request
+    def route_reads():
+        if request.method in _READ_METHODS and session.get(_STICKY_KEY, 0) < time.time():
+            db.session.info['read_bind'] = engine
+            db.session.info['read_routed'] = True
+
+    @app.after_request
+    def stick_to_primary(response):
+        info = db.session.info
+        # A write request, or a routed read that went on to write (its read bind was dropped)
+        if request.method not in _READ_METHODS or (info.get('read_routed') and 'read_bind' not in info):
+            session[_STICKY_KEY] = time.time() + window
+        return response
@@ -0,0 +1,213 @@
+import html
+import re
+import bleach
+import click
+from sqlalchemy import event, func, inspect, literal_column, text
+from models import db, Course, LibraryBook, News
+
+# Each indexed model gets a type code; the FTS rowid is (id * 4 + code) so a
+# row can be replaced or removed by rowid without scanning the index.
+_TYPE_CODES = {Course: 1, LibraryBook: 2, News: 3}
+_BODY_FIELDS = {Course: 'description', LibraryBook: 'description', News: 'content'}
+
+# bm25 column weights: a title hit counts ten times a body hit
+_BM25 = 'bm25(search_index, 10.0, 1.0)'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# PostgreSQL has no FTS5: each table gets a GIN index over a weighted tsvector
+# instead (title A, tag-stripped body B). Queries must repeat the indexed
+# expression exactly, so its constants are inlined rather than bound.
+_PG_CONFIG = literal_column("'simple'")
+
+
+def strip_html(value):
+    """Return the plain text of rich-text HTML for indexing."""
+    if not value:
+        return ''
+    return html.unescape(bleach.clean(value, tags=[], strip=True))
+
+
+def build_match_query(search):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    tokens = _TOKEN_RE.findall(search or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def build_tsquery(search):
+    """Turn free text into a PostgreSQL tsquery: every word must match as a prefix."""
+    tokens = _TOKEN_RE.findall(search or '')
+    return ' & '.join(f'{token}:*' for token in tokens)
+
+
+def _pg_document(title, body):
+    """The indexed tsvector expression over the given title and body columns."""
+    def weighted(value, weight):
+        return func.setweight(func.to_tsvector(_PG_CONFIG, value), literal_column(f"'{weight}'"))
+    plain_body = func.regexp_replace(
+        func.coalesce(body, literal_column("''")), literal_column("'<[^>]+>'"),
+        literal_column("' '"), literal_column("'g'")
+    )
+    return weighted(func.coalesce(title, literal_column("''")), 'A').op('||')(weighted(plain_body, 'B'))
+
+
+def _pg_index_name(model):
+    return f'ix_{model.__table__.name}_search'
+
+
+def _create_pg_indexes(connection):
+    for model, body_field in _BODY_FIELDS.items():
+        table = model.__table__.name
+        document = _pg_document(literal_column('title'), literal_column(body_field)).compile(dialect=connection.dialect)
+        connection.execute(text(
+            f'CREATE INDEX IF NOT EXISTS {_pg_index_name(model)} ON "{table}" USING gin (({document}))'
+        ))
+
+
+def _rowid(model, doc_id):
+    return doc_id * 4 + _TYPE_CODES[model]
+
+
+def _document(obj):
+    model = type(obj)
+    return {
+        'rowid': _rowid(model, obj.id),
+        'title': obj.title or '',
+        'body': strip_html(getattr(obj, _BODY_FIELDS[model])),
+    }
+
+
+def _is_sqlite(connection):
+    return connection.dialect.name == 'sqlite'
+
+
+def _create_index(connection):
+    """Create the FTS5 table if missing, filling it from existing rows when created."""
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")
+    ).first()
+    if exists:
+        return
+    connection.execute(text(
+        "CREATE VIRTUAL TABLE search_index USING fts5("
+        "title, body, tokenize = 'unicode61 remove_diacritics 2')"
+    ))
+    _populate(connection)
+
+
+def _populate(connection):
+    inspector = inspect(connection)
+    for model, body_field in _BODY_FIELDS.items():
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue
+        rows = connection.execute(
+            db.select(table.c.id, table.c.title, table.c[body_field])
+        )
+        documents = [
+            {'rowid': _rowid(model, row_id), 'title': title or '', 'body': strip_html(body)}
+            for row_id, title, body in rows
+        ]
+        if documents:
+            connection.execute(
+                text('INSERT INTO search_index (rowid, title, body) VALUES (:rowid, :title, :body)'),
+                documents
+            )
+
+
+def rebuild_search_index():
+    """Drop and rebuild the full-text index from the Course, LibraryBook and News tables."""
+    connection = db.session.connection()
+    if _is_sqlite(connection):
+        connection.execute(text('DROP TABLE IF EXISTS search_index'))
+        _create_index(connection)
+    elif connection.dialect.name == 'postgresql':
+        for model in _BODY_FIELDS:
+            connection.execute(text(f'DROP INDEX IF EXISTS {_pg_index_name(model)}'))
+        _create_pg_indexes(connection)
+    db.session.commit()
+
+
+def init_search_index(app):
+    """Make sure the search index exists before the app serves requests."""
+    with app.app_context():
+        with db.engine.begin() as connection:
+            if _is_sqlite(connection):
+                _create_index(connection)
+            elif connection.dialect.name == 'postgresql':
+                _create_pg_indexes(connection)
+
+
+def ranked_matches(model, search):
+    """Subquery of (doc_id, rank) for rows of model matching search, best first.
+
+    Returns None when the search has no usable words.
+    """
+    match = build_match_query(search)
+    if not match:
+        return None
+    return text(
+        f'SELECT rowid / 4 AS doc_id, {_BM25} AS rank FROM search_index '
+        'WHERE search_index MATCH :match AND rowid % 4 = :code'
+    ).bindparams(match=match, code=_TYPE_CODES[model]).columns(
+        doc_id=db.Integer, rank=db.Float
+    ).subquery()
+
+
+def apply_search(query, model, search, *columns):
+    """Filter query to rows matching search and order it by relevance.
+
+    Uses the FTS5 index on SQLite and the tsvector GIN index on PostgreSQL;
+    on other databases falls back to case-insensitive LIKE over the given
+    columns.
+    """
+    if not search:
+        return query
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        tsquery = build_tsquery(search)
+        if not tsquery:
+            return query
+        document = _pg_document(model.title, getattr(model, _BODY_FIELDS[model]))
+        match = func.to_tsquery(_PG_CONFIG, tsquery)
+        return query.filter(document.op('@@')(match)).order_by(func.ts_rank(document, match).desc())
+    if dialect != 'sqlite':
+        pattern = f'%{search}%'
+        return query.filter(db.or_(*[column.ilike(pattern) for column in columns]))
+
+    matches = ranked_matches(model, search)
+    if matches is None:
+        return query
+    return query.join(matches, model.id == matches.c.doc_id).order_by(matches.c.rank)
+
+
+def _index_row(mapper, connection, target):
+    if not _is_sqlite(connection):
+        return
+    connection.execute(
+        text('INSERT OR REPLACE INTO search_index (rowid, title, body) VALUES (:rowid, :title, :body)'),
+        _document(target)
+    )
+
+
+def _unindex_row(mapper, connection, target):
+    if not _is_sqlite(connection):
+        return
+    connection.execute(
+        text('DELETE FROM search_index WHERE rowid = :rowid'),
+        {'rowid': _rowid(type(target), target.id)}
+    )
+
+
+for _model in _TYPE_CODES:
+    event.listen(_model, 'after_insert', _index_row)
+    event.listen(_model, 'after_update', _index_row)
+    event.listen(_model, 'after_delete', _unindex_row)
+
+
+def register_search_commands(app):
+    @app.cli.command('search-rebuild')
+    def search_rebuild():
+        """Rebuild the full-text search index for courses, library and news."""
+        rebuild_search_index()
+        click.echo('Search index rebuilt.')
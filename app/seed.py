@@ -1,6 +1,6 @@
 from models import (db, User, Course, CourseModule, CourseMaterial, LibraryBook,
-                    ElearningModule, CompetencyChecklist, ClinicalConfig)
-import json
+                    ElearningModule, CompetencyChecklist)
+from app.clinical_config import build_default_config
 
 
 def init_db(app):
@@ -14,61 +14,7 @@ def init_db(app):
             return
 
         # Create default clinical configuration
-        default_config = ClinicalConfig(
-            documents_json=json.dumps([
-                {'type': 'referral', 'label': 'Referral Letter', 'requires_expiration': True},
-                {'type': 'health', 'label': 'Health Letter', 'requires_expiration': True},
-                {'type': 'insurance', 'label': 'Insurance', 'requires_expiration': True},
-                {'type': 'integrity_pact', 'label': 'Integrity Pact', 'requires_expiration': False}
-            ]),
-            agreements_json=json.dumps([
-                {'type': 'confidentiality', 'title': 'Confidentiality', 'text': 'I hereby agree to maintain strict patient confidentiality and comply with all data protection regulations...'},
-                {'type': 'ethics', 'title': 'Ethics', 'text': 'I commit to upholding the highest standards of professional ethics in all clinical interactions...'},
-                {'type': 'discipline', 'title': 'Discipline', 'text': 'I acknowledge and accept the disciplinary policies and sanctions outlined by the hospital...'},
-                {'type': 'emergency', 'title': 'Emergency Procedures', 'text': 'I understand the emergency procedures and agree to follow all safety protocols...'}
-            ]),
-            required_course_ids_json=json.dumps([]),
-            pretest_questions_json=json.dumps([
-                {
-                    'id': 1,
-                    'question': 'Which action is most important before touching a patient?',
-                    'options': ['Hand hygiene', 'Adjust bed', 'Write notes', 'Check phone'],
-                    'correct_option': 'Hand hygiene'
-                },
-                {
-                    'id': 2,
-                    'question': 'What should you do if your ID badge is missing?',
-                    'options': ['Report to supervisor', 'Borrow a friend’s badge', 'Ignore it', 'Leave the unit'],
-                    'correct_option': 'Report to supervisor'
-                },
-                {
-                    'id': 3,
-                    'question': 'Which item is part of basic PPE?',
-                    'options': ['Gloves', 'Necklace', 'Perfume', 'Watch'],
-                    'correct_option': 'Gloves'
-                }
-            ]),
-            posttest_questions_json=json.dumps([
-                {
-                    'id': 1,
-                    'question': 'When should you perform hand hygiene?',
-                    'options': ['Before and after patient contact', 'Only after meals', 'Only at shift end', 'Once per day'],
-                    'correct_option': 'Before and after patient contact'
-                },
-                {
-                    'id': 2,
-                    'question': 'Which is the correct way to dispose of sharps?',
-                    'options': ['Place in a sharps container', 'Throw in regular trash', 'Leave on tray', 'Wrap in tissue'],
-                    'correct_option': 'Place in a sharps container'
-                },
-                {
-                    'id': 3,
-                    'question': 'If you witness a safety incident, what is the first step?',
-                    'options': ['Ensure patient safety', 'Post on chat', 'Finish other tasks', 'Ignore it'],
-                    'correct_option': 'Ensure patient safety'
-                }
-            ])
-        )
+        default_config = build_default_config()
         db.session.add(default_config)
         db.session.commit()
 
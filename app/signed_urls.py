@@ -0,0 +1,87 @@
+import base64
+import hashlib
+import hmac
+import re
+import time
+from flask import current_app, url_for
+from flask.sessions import SecureCookieSessionInterface
+from markupsafe import escape
+from app.storage import relative_upload_path
+
+ASSET_PREFIX = '/assets/u/'
+# src="/uploads/..." in stored rich text, as inserted by the editor's image upload
+_UPLOAD_SRC = re.compile(r'''(\bsrc\s*=\s*)(["'])(/uploads/[^"']+)\2''', re.IGNORECASE)
+
+
+def _signature(path, expires, secret_key=None):
+    key = (secret_key or current_app.config['SECRET_KEY']).encode()
+    digest = hmac.new(key, f'asset:{path}:{expires}'.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:16]).decode().rstrip('=')
+
+
+def asset_expiry(now=None):
+    """Expiry rounded to ASSET_URL_TTL buckets, so a URL stays identical (and cacheable)
+    across page renders for at least one TTL."""
+    ttl = current_app.config.get('ASSET_URL_TTL', 3600)
+    now = int(now if now is not None else time.time())
+    return (now // ttl + 2) * ttl
+
+
+def asset_url(path):
+    """Signed, time-limited URL for an uploaded file, for use in templates.
+
+    Accepts any stored reference form ('/uploads/...', relative or absolute).
+    Values that are not uploads (external URLs, empty) are returned unchanged.
+    """
+    if not path or '://' in path or path.startswith('//'):
+        return path
+    relative = relative_upload_path(path)
+    if not relative:
+        return path
+    expires = asset_expiry()
+    return url_for('signed_asset', filename=relative, e=expires, s=_signature(relative, expires))
+
+
+def signed_uploads(html):
+    """Rewrite /uploads/ image sources in stored rich text to signed asset URLs.
+
+    Template filter, applied before |safe: embedded editor images are then
+    served by the static fast path instead of one logged-in request each.
+    """
+    if not html or '/uploads/' not in html:
+        return html
+    return _UPLOAD_SRC.sub(lambda m: f'{m.group(1)}{m.group(2)}{escape(asset_url(m.group(3)))}{m.group(2)}', html)
+
+
+def verify_asset_signature(path, expires, signature, now=None, secret_key=None):
+    """Check a signed asset URL without touching the database.
+
+    secret_key defaults to the current app's SECRET_KEY; pass it explicitly
+    when no app context is available.
+    """
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < (now if now is not None else time.time()):
+        return False
+    return hmac.compare_digest(signature or '', _signature(path, expires, secret_key))
+
+
+def remaining_validity(expires):
+    """Seconds until a verified asset URL expires."""
+    return max(int(expires) - int(time.time()), 0)
+
+
+class AssetSessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions, except for signed asset URLs.
+
+    Signed assets are authorised by their URL alone, so their requests get a
+    null session: no cookie is decoded, no user is loaded and the response
+    does not vary on Cookie, which lets shared caches keep it.
+    """
+
+    def open_session(self, app, request):
+        if request.path.startswith(ASSET_PREFIX):
+            return self.make_null_session(app)
+        return super().open_session(app, request)
@@ -0,0 +1,180 @@
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from models import db
+
+
+class WriteQueueTimeout(RuntimeError):
+    """A write waited longer than SQLITE_WRITE_TIMEOUT for its turn."""
+
+
+class WriteQueue:
+    """First-come, first-served lock for write transactions within one process.
+
+    Waiting writers queue in arrival order instead of all spinning in
+    SQLite's busy handler, so the wait of any one write is bounded by the
+    writes ahead of it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = deque()
+
+    def acquire(self, timeout=None):
+        waiter = threading.Event()
+        with self._lock:
+            self._waiters.append(waiter)
+            if self._waiters[0] is waiter:
+                return True
+        if waiter.wait(timeout):
+            return True
+        with self._lock:
+            # Granted just as the wait timed out
+            if waiter.is_set():
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    def release(self):
+        with self._lock:
+            self._waiters.popleft()
+            if self._waiters:
+                self._waiters[0].set()
+
+
+def _pragmas(app, read_only=False):
+    pragmas = {
+        'journal_mode': 'WAL',  # Readers never block on the writer, nor it on them
+        'synchronous': 'NORMAL',  # Durable across crashes of the app; fsync only at checkpoints
+        'busy_timeout': app.config.get('SQLITE_BUSY_TIMEOUT', 5000),
+        'mmap_size': app.config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'cache_size': app.config.get('SQLITE_CACHE_SIZE', -64000),
+    }
+    if read_only:
+        # Changing the journal mode is a write; the primary engine has already done it
+        del pragmas['journal_mode'], pragmas['synchronous']
+    return pragmas
+
+
+def apply_sqlite_profile(app, engine, read_only=False):
+    """Run the profile's PRAGMAs on every new connection of engine."""
+    pragmas = _pragmas(app, read_only)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+# PostgreSQL SQLSTATEs worth retrying: serialization failure, deadlock, lock not available
+_RETRYABLE_PGCODES = {'40001', '40P01', '55P03'}
+
+
+def is_busy_error(exc):
+    """Whether exc is the database reporting a lock conflict that a retry can resolve."""
+    if isinstance(exc, WriteQueueTimeout):
+        return True
+    if not isinstance(exc, OperationalError):
+        return False
+    if getattr(exc.orig, 'pgcode', None) in _RETRYABLE_PGCODES:
+        return True
+    return 'database is locked' in str(exc.orig) or 'database is busy' in str(exc.orig)
+
+
+def _write_queue():
+    return current_app.extensions.get('sqlite_write_queue')
+
+
+@contextmanager
+def write_slot():
+    """Hold this process's write turn, for writes made outside db.session."""
+    queue = _write_queue()
+    if queue is None:
+        yield
+        return
+    if not queue.acquire(current_app.config.get('SQLITE_WRITE_TIMEOUT', 10)):
+        raise WriteQueueTimeout('Timed out waiting for the database write queue')
+    try:
+        yield
+    finally:
+        queue.release()
+
+
+def retry_on_busy(view):
+    """Run the view again, after a rollback and a jittered backoff, when the database is busy.
+
+    Only for views whose work before the commit is all database work: form
+    data can be read again, but an uploaded file stream cannot.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        attempts = current_app.config.get('WRITE_RETRY_ATTEMPTS', 4)
+        delay = current_app.config.get('WRITE_RETRY_DELAY', 0.05)
+        for attempt in range(attempts):
+            try:
+                return view(*args, **kwargs)
+            except (OperationalError, WriteQueueTimeout) as exc:
+                if attempt == attempts - 1 or not is_busy_error(exc):
+                    raise
+                db.session.rollback()
+                # Full jitter: retries from competing workers spread out instead of colliding again
+                time.sleep(random.uniform(0, delay * 2 ** attempt))
+    return wrapper
+
+
+def _take_write_turn(session):
+    if session.info.get('sqlite_write_turn'):
+        return
+    queue = _write_queue()
+    if queue is None:
+        return
+    if not queue.acquire(current_app.config.get('SQLITE_WRITE_TIMEOUT', 10)):
+        raise WriteQueueTimeout('Timed out waiting for the database write queue')
+    session.info['sqlite_write_turn'] = queue
+
+
+@event.listens_for(db.session, 'before_flush')
+def _take_write_turn_on_flush(session, flush_context, instances):
+    _take_write_turn(session)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _take_write_turn_on_dml(orm_execute_state):
+    # INSERT/UPDATE/DELETE passed to session.execute() never flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        session = orm_execute_state.session
+        if not session.in_transaction():
+            # Begin now, so the turn is released when this transaction ends even if the statement fails
+            session.begin()
+        _take_write_turn(session)
+
+
+@event.listens_for(db.session, 'after_transaction_end')
+def _give_up_write_turn(session, transaction):
+    # Held from the first flush or DML statement until the outermost transaction commits or rolls back
+    if transaction.parent is None:
+        queue = session.info.pop('sqlite_write_turn', None)
+        if queue is not None:
+            queue.release()
+
+
+def init_sqlite(app):
+    """Apply the SQLite connection profile and, if enabled, the per-process write queue.
+
+    Does nothing for other databases.
+    """
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    apply_sqlite_profile(app, engine)
+    if app.config.get('SQLITE_WRITE_QUEUE'):
+        app.extensions['sqlite_write_queue'] = WriteQueue()
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import tempfile
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
+from werkzeug.utils import secure_filename
+from models import db, StoredBlob
+from app.dialect import dialect_insert
+
+BLOB_DIR = 'blobs'
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _upload_root():
+    return current_app.config['UPLOAD_FOLDER']
+
+
+def _extension(filename):
+    filename = secure_filename(filename or '')
+    if '.' not in filename:
+        return ''
+    return '.' + filename.rsplit('.', 1)[1].lower()
+
+
+def blob_path(sha256, extension=''):
+    """Fanned-out location of a blob relative to UPLOAD_FOLDER."""
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}'
+
+
+def relative_upload_path(path):
+    """Normalise a stored reference ('/uploads/...', relative or absolute) to a path under UPLOAD_FOLDER.
+
+    Returns None for paths outside the upload folder.
+    """
+    if not path:
+        return None
+    if path.startswith('/uploads/'):
+        path = path[len('/uploads/'):]
+    elif os.path.isabs(path):
+        path = os.path.relpath(path, _upload_root())
+    path = path.replace(os.sep, '/')
+    if path.startswith('../') or path == '..':
+        return None
+    return path
+
+
+def store_upload(file_obj):
+    """Store an uploaded file by content and return its path relative to UPLOAD_FOLDER.
+
+    The upload is streamed to a temporary file while its SHA-256 is computed,
+    then moved to blobs/<aa>/<bb>/<sha256><ext>. If that blob already exists the
+    copy is discarded, so identical uploads share one file. The blob's reference
+    count is incremented in the current transaction, which the caller must
+    commit: if it is rolled back the file stays on disk unreferenced, and a
+    later release of the same content would unlink it while still in use.
+    """
+    root = _upload_root()
+    tmp_dir = os.path.join(root, BLOB_DIR, 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file_obj.stream.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+
+        sha256 = digest.hexdigest()
+        path = blob_path(sha256, _extension(file_obj.filename))
+        final_path = os.path.join(root, path)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    table = StoredBlob.__table__
+    stmt = dialect_insert(table).values(
+        path=path, sha256=sha256, size=size, ref_count=1, created_at=datetime.utcnow()
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['path'],
+        set_={'ref_count': table.c.ref_count + 1}
+    ))
+    return path
+
+
+def release_upload(path):
+    """Drop one reference to a stored upload.
+
+    For blobs the reference count is decremented in the current transaction and
+    the file is unlinked after commit once nothing references it any more.
+    Files saved before the blob store existed are removed directly, as before.
+    """
+    path = relative_upload_path(path)
+    if not path:
+        return
+    if not path.startswith(BLOB_DIR + '/'):
+        legacy_path = os.path.join(_upload_root(), path)
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+        return
+
+    table = StoredBlob.__table__
+    db.session.execute(
+        table.update().where(table.c.path == path).values(ref_count=table.c.ref_count - 1)
+    )
+    deleted = db.session.execute(
+        table.delete().where(table.c.path == path, table.c.ref_count <= 0)
+    ).rowcount
+    if deleted:
+        db.session.info.setdefault('released_blobs', {})[path] = os.path.join(_upload_root(), path)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _unlink_released_blobs(session):
+    released = session.info.pop('released_blobs', None)
+    if not released:
+        return
+    table = StoredBlob.__table__
+    with db.engine.connect() as connection:
+        # A concurrent upload may have re-created the blob since it was released
+        still_referenced = set(connection.execute(
+            db.select(table.c.path).where(table.c.path.in_(released.keys()))
+        ).scalars())
+    for path, full_path in released.items():
+        if path not in still_referenced and os.path.exists(full_path):
+            os.remove(full_path)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_released_blobs(session):
+    session.info.pop('released_blobs', None)
@@ -0,0 +1,117 @@
+from sqlalchemy import case, func, select
+from models import (db, User, StudentProfile, LogbookEntry, DailyJournal, IncidentReport,
+                    CompetencyChecklist, CompetencyProgress)
+
+# Sort key accepted from the query string -> label of the rollup column
+SORT_COLUMNS = {
+    'name': 'username',
+    'student_id': 'student_id_number',
+    'unit': 'current_unit',
+    'pending': 'pending_validations',
+    'journals': 'journals_awaiting',
+    'incidents': 'open_incidents',
+    'activity': 'last_activity',
+    'competency': 'competency_percent',
+}
+DEFAULT_SORT = 'pending'
+
+
+def _rollup_columns(supervisor_id):
+    """Per-student aggregates as grouped subqueries, outer-joined onto StudentProfile.
+
+    Each subquery only reads the supervisor's students, so the cost follows
+    the size of the roster rather than of the tables.
+    """
+    students = select(StudentProfile.id).where(StudentProfile.supervisor_id == supervisor_id)
+
+    logbook = db.session.query(
+        LogbookEntry.student_id.label('student_id'),
+        func.sum(case((LogbookEntry.validated.is_(True), 0), else_=1)).label('pending'),
+        func.max(LogbookEntry.entry_date).label('last_entry')
+    ).filter(LogbookEntry.student_id.in_(students)).group_by(LogbookEntry.student_id).subquery()
+
+    journals = db.session.query(
+        DailyJournal.student_id.label('student_id'),
+        func.sum(case((DailyJournal.supervisor_feedback.is_(None), 1), else_=0)).label('awaiting'),
+        func.max(DailyJournal.entry_date).label('last_entry')
+    ).filter(DailyJournal.student_id.in_(students)).group_by(DailyJournal.student_id).subquery()
+
+    incidents = db.session.query(
+        IncidentReport.student_id.label('student_id'),
+        func.count(IncidentReport.id).label('open')
+    ).filter(
+        IncidentReport.student_id.in_(students),
+        IncidentReport.status != 'closed'
+    ).group_by(IncidentReport.student_id).subquery()
+
+    achieved = db.session.query(
+        CompetencyProgress.student_id.label('student_id'),
+        func.count(CompetencyProgress.id).label('achieved')
+    ).join(CompetencyChecklist, CompetencyChecklist.id == CompetencyProgress.competency_id).join(
+        StudentProfile, StudentProfile.id == CompetencyProgress.student_id
+    ).filter(
+        StudentProfile.supervisor_id == supervisor_id,
+        CompetencyChecklist.program == StudentProfile.program,
+        CompetencyChecklist.is_mandatory.is_(True),
+        CompetencyProgress.competency_level.in_(['competent', 'advanced'])
+    ).group_by(CompetencyProgress.student_id).subquery()
+
+    required = db.session.query(
+        CompetencyChecklist.program.label('program'),
+        func.count(CompetencyChecklist.id).label('required')
+    ).filter(CompetencyChecklist.is_mandatory.is_(True)).group_by(CompetencyChecklist.program).subquery()
+
+    # Later of the two activity dates; CASE instead of a two-argument max()
+    # keeps this portable and handles a missing side.
+    last_activity = case(
+        (logbook.c.last_entry >= journals.c.last_entry, logbook.c.last_entry),
+        else_=func.coalesce(journals.c.last_entry, logbook.c.last_entry)
+    )
+    required_count = func.coalesce(required.c.required, 0)
+    competency_percent = case(
+        (required_count > 0, func.coalesce(achieved.c.achieved, 0) * 100 // required_count),
+        else_=None
+    )
+
+    columns = [
+        StudentProfile.id.label('id'),
+        User.username.label('username'),
+        StudentProfile.student_id.label('student_id_number'),
+        StudentProfile.program.label('program'),
+        StudentProfile.current_unit.label('current_unit'),
+        func.coalesce(logbook.c.pending, 0).label('pending_validations'),
+        func.coalesce(journals.c.awaiting, 0).label('journals_awaiting'),
+        func.coalesce(incidents.c.open, 0).label('open_incidents'),
+        last_activity.label('last_activity'),
+        func.coalesce(achieved.c.achieved, 0).label('competencies_achieved'),
+        required_count.label('competencies_required'),
+        competency_percent.label('competency_percent'),
+    ]
+    joins = [
+        (logbook, logbook.c.student_id == StudentProfile.id),
+        (journals, journals.c.student_id == StudentProfile.id),
+        (incidents, incidents.c.student_id == StudentProfile.id),
+        (achieved, achieved.c.student_id == StudentProfile.id),
+        (required, required.c.program == StudentProfile.program),
+    ]
+    return columns, joins
+
+
+def supervisor_rollup(supervisor_id, sort=DEFAULT_SORT, descending=True):
+    """One row per supervised student with the figures the dashboard needs.
+
+    Everything is computed by a single SELECT: StudentProfile outer-joined to
+    grouped subqueries over logbook entries, journals, open incidents and
+    competency progress, sorted in SQL by one of SORT_COLUMNS.
+    """
+    columns, joins = _rollup_columns(supervisor_id)
+    query = db.session.query(*columns).join(User, User.id == StudentProfile.user_id)
+    for subquery, onclause in joins:
+        query = query.outerjoin(subquery, onclause)
+    query = query.filter(StudentProfile.supervisor_id == supervisor_id)
+
+    label = SORT_COLUMNS.get(sort, SORT_COLUMNS[DEFAULT_SORT])
+    sort_column = next(column for column in columns if column.key == label)
+    # Spelled out: PostgreSQL sorts NULLs (students with no activity yet) the opposite way to SQLite
+    order = sort_column.desc().nulls_last() if descending else sort_column.asc().nulls_first()
+    return query.order_by(order, User.username).all()
@@ -1,12 +1,8 @@
-from datetime import datetime, timedelta
 from functools import wraps
 import bleach
-import os
-import uuid
-from flask import flash, redirect, url_for, current_app
+from flask import flash, redirect, url_for
 from flask_login import current_user
-from models import AttendanceLog
-from werkzeug.utils import secure_filename
+from app.storage import store_upload
 
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'ppt', 'pptx', 'txt'}
 ALLOWED_IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'svg'}
@@ -22,15 +18,15 @@ def allowed_image_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_IMAGE_EXTENSIONS
 
 
-def save_upload_image(file_obj, subfolder='materials'):
-    """Save uploaded image file and return relative path.
+def save_upload_image(file_obj):
+    """Save uploaded image file and return its URL path.
     
     Args:
         file_obj: File object from request.files
-        subfolder: Subfolder within uploads (default: 'materials')
     
     Returns:
-        Relative path to saved image or None if invalid
+        URL path (/uploads/...) of the stored image or None if invalid.
+        The caller must commit the session to keep the blob's reference.
     """
     if not file_obj or file_obj.filename == '':
         return None
@@ -38,21 +34,8 @@ def save_upload_image(file_obj, subfolder='materials'):
     if not allowed_image_file(file_obj.filename):
         return None
     
-    # Generate unique filename
-    ext = file_obj.filename.rsplit('.', 1)[1].lower()
-    unique_filename = f"{uuid.uuid4()}.{ext}"
-    
-    # Create subfolder if it doesn't exist
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    subfolder_path = os.path.join(upload_folder, subfolder)
-    os.makedirs(subfolder_path, exist_ok=True)
-    
-    # Save file
-    file_path = os.path.join(subfolder_path, unique_filename)
-    file_obj.save(file_path)
-    
-    # Return relative path for URL usage
-    return f'/uploads/{subfolder}/{unique_filename}'
+    # Identical images share one content-addressed blob
+    return f'/uploads/{store_upload(file_obj)}'
 
 
 def convert_youtube_url(url):
@@ -135,17 +118,3 @@ def pemateri_required(f):
             return redirect(url_for('index'))
         return f(*args, **kwargs)
     return decorated_function
-
-
-def get_course_attendance_today(user_id, course_id):
-    """Check if user has marked attendance for this course today."""
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = today_start + timedelta(days=1)
-
-    attendance = AttendanceLog.query.filter(
-        AttendanceLog.user_id == user_id,
-        AttendanceLog.course_id == course_id,
-        AttendanceLog.timestamp >= today_start,
-        AttendanceLog.timestamp < today_end
-    ).first()
-    return attendance
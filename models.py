@@ -1,9 +1,27 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """Session that can send plain reads to a separate engine.
+
+    While info['read_bind'] is set (see app/routing.py), queries use that
+    engine. The first flush or INSERT/UPDATE/DELETE clears it, so the rest
+    of the transaction reads its own writes from the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and 'read_bind' in self.info:
+            if not self._flushing and not getattr(clause, 'is_dml', False):
+                return self.info['read_bind']
+            del self.info['read_bind']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     """
@@ -27,6 +45,12 @@ class User(UserMixin, db.Model):
     enrollments = db.relationship('CourseEnrollment', backref='user', lazy='dynamic')
     instructed_courses = db.relationship('Course', backref='instructor_user', lazy='dynamic', foreign_keys='Course.instructor_id')
     
+    # Partial index: only the few accounts awaiting role approval are indexed
+    __table_args__ = (
+        db.Index('ix_user_pending_role', 'pending_role',
+                 sqlite_where=db.text('pending_role IS NOT NULL'), postgresql_where=db.text('pending_role IS NOT NULL')),
+    )
+    
     def set_password(self, password):
         """Hash and set password."""
         self.password_hash = generate_password_hash(password)
@@ -62,7 +86,10 @@ class Course(db.Model):
     thumbnail_url = db.Column(db.String(255), nullable=True)
     instructor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)  # Foreign Key to User
     category = db.Column(db.String(50), default='medical', nullable=False)  # 'medical', 'admin', 'it'
+    module_count = db.Column(db.Integer, default=0, nullable=False)  # Maintained by app/counters.py
+    enrollment_count = db.Column(db.Integer, default=0, nullable=False)  # Maintained by app/counters.py
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     modules = db.relationship('CourseModule', backref='course', lazy='dynamic', cascade='all, delete-orphan')
@@ -84,7 +111,9 @@ class CourseModule(db.Model):
     description = db.Column(db.Text, nullable=True)
     image_path = db.Column(db.String(255), nullable=True)  # Path to module image
     order_index = db.Column(db.Integer, default=0, nullable=False)
+    material_count = db.Column(db.Integer, default=0, nullable=False)  # Maintained by app/counters.py
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     materials = db.relationship('CourseMaterial', backref='module', lazy='dynamic', cascade='all, delete-orphan')
@@ -105,7 +134,10 @@ class CourseMaterial(db.Model):
     image_path = db.Column(db.String(255), nullable=True)  # Path to material thumbnail/image
     file_path = db.Column(db.String(255), nullable=True)  # Path to uploaded file or external URL
     type = db.Column(db.String(50), default='pdf', nullable=False)  # 'pdf', 'video', 'assignment'
+    comment_count = db.Column(db.Integer, default=0, nullable=False)  # Maintained by app/counters.py
+    submission_count = db.Column(db.Integer, default=0, nullable=False)  # Maintained by app/counters.py
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
         return f'<CourseMaterial {self.title}>'
@@ -125,6 +157,9 @@ class LibraryBook(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Listing by status, newest first (library, approvals queue)
+    __table_args__ = (db.Index('ix_library_book_status_created_at', 'status', 'created_at'),)
+    
     def __repr__(self):
         return f'<LibraryBook {self.title}>'
 
@@ -154,11 +189,14 @@ class AttendanceLog(db.Model):
     Can be used for general daily attendance or specific course attendance.
     """
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=True, index=True)  # Optional, can be null for general attendance
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    attendance_date = db.Column(db.Date, nullable=False)  # Local calendar day of the check-in
     status = db.Column(db.String(20), default='present', nullable=False)  # 'present', others if extended
     
+    __table_args__ = (db.UniqueConstraint('user_id', 'course_id', 'attendance_date', name='uq_attendance_user_course_day'),)
+    
     def __repr__(self):
         return f'<AttendanceLog User:{self.user_id} Course:{self.course_id}>'
 
@@ -211,6 +249,7 @@ class MaterialSubmission(db.Model):
     feedback = db.Column(db.Text, nullable=True)  # Instructor feedback
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     graded_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     material = db.relationship('CourseMaterial', backref='submissions', lazy=True)
@@ -223,6 +262,21 @@ class MaterialSubmission(db.Model):
         return f'<MaterialSubmission Material:{self.material_id} User:{self.user_id}>'
 
 
+class StoredBlob(db.Model):
+    """
+    Content-addressed upload, stored once on disk and shared by every row that references it.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(255), unique=True, nullable=False)  # Relative to UPLOAD_FOLDER, e.g. blobs/ab/cd/<sha256>.pdf
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StoredBlob {self.path} refs:{self.ref_count}>'
+
+
 # ==================== CLINICAL PLATFORM MODELS ====================
 
 class StudentProfile(db.Model):
@@ -278,6 +332,9 @@ class LegalDocument(db.Model):
     student = db.relationship('StudentProfile', backref='legal_documents', lazy=True)
     verified_by = db.relationship('User', backref='verified_documents', lazy=True)
     
+    # Review queue by status, newest first
+    __table_args__ = (db.Index('ix_legal_document_status_uploaded_at', 'status', 'uploaded_at'),)
+    
     def __repr__(self):
         return f'<LegalDocument {self.document_type} Student:{self.student_id}>'
 
@@ -390,7 +447,7 @@ class LogbookEntry(db.Model):
     Digital logbook entries for clinical practice.
     """
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=False, index=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=False)
     entry_date = db.Column(db.Date, nullable=False, index=True)
     unit = db.Column(db.String(100), nullable=False)  # ER, ICU, OR, Inpatient, Outpatient
     procedure_name = db.Column(db.String(255), nullable=False)
@@ -416,6 +473,12 @@ class LogbookEntry(db.Model):
     student = db.relationship('StudentProfile', backref='logbook_entries', lazy=True)
     supervisor = db.relationship('User', backref='validated_logbook_entries', lazy=True)
     
+    # A student's entries by date, and their validated/pending counts
+    __table_args__ = (
+        db.Index('ix_logbook_entry_student_id_entry_date', 'student_id', 'entry_date'),
+        db.Index('ix_logbook_entry_student_id_validated', 'student_id', 'validated'),
+    )
+    
     def __repr__(self):
         return f'<LogbookEntry {self.procedure_name} Student:{self.student_id}>'
 
@@ -425,7 +488,7 @@ class PatientCase(db.Model):
     Long-term patient case tracking for clinical students.
     """
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=False, index=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=False)
     case_title = db.Column(db.String(255), nullable=False)
     patient_alias = db.Column(db.String(100), nullable=True)  # Anonymized patient identifier
     unit = db.Column(db.String(100), nullable=True)
@@ -441,6 +504,9 @@ class PatientCase(db.Model):
     # Relationships
     student = db.relationship('StudentProfile', backref='patient_cases', lazy=True)
 
+    # A student's cases by status
+    __table_args__ = (db.Index('ix_patient_case_student_id_status', 'student_id', 'status'),)
+    
     def __repr__(self):
         return f'<PatientCase {self.case_title} Student:{self.student_id}>'
 
@@ -525,7 +591,7 @@ class DailyJournal(db.Model):
     Daily reflection journal entries.
     """
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=False, index=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=False)
     entry_date = db.Column(db.Date, nullable=False, index=True)
     shift = db.Column(db.String(20), nullable=True)  # 'morning', 'afternoon', 'night'
     unit = db.Column(db.String(100), nullable=True)
@@ -548,6 +614,14 @@ class DailyJournal(db.Model):
     student = db.relationship('StudentProfile', backref='daily_journals', lazy=True)
     supervisor = db.relationship('User', backref='journal_feedbacks', lazy=True)
     
+    # A student's journals by date; partial index over those awaiting supervisor feedback
+    __table_args__ = (
+        db.Index('ix_daily_journal_student_id_entry_date', 'student_id', 'entry_date'),
+        db.Index('ix_daily_journal_awaiting_feedback', 'student_id',
+                 sqlite_where=db.text('supervisor_feedback IS NULL'),
+                 postgresql_where=db.text('supervisor_feedback IS NULL')),
+    )
+    
     def __repr__(self):
         return f'<DailyJournal Student:{self.student_id} Date:{self.entry_date}>'
 
@@ -684,7 +758,7 @@ class IncidentReport(db.Model):
     """
     id = db.Column(db.Integer, primary_key=True)
     reporter_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=True, index=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=True)
     incident_type = db.Column(db.String(50), nullable=False)  # 'safety', 'ethics', 'near_miss', 'adverse_event'
     severity = db.Column(db.String(20), nullable=False)  # 'low', 'medium', 'high', 'critical'
     incident_date = db.Column(db.DateTime, nullable=False)
@@ -709,6 +783,9 @@ class IncidentReport(db.Model):
     student = db.relationship('StudentProfile', backref='incident_reports', lazy=True)
     investigator = db.relationship('User', foreign_keys=[investigator_id], backref='investigated_incidents', lazy=True)
     
+    # A student's incidents by status (open incidents on the supervisor dashboard)
+    __table_args__ = (db.Index('ix_incident_report_student_id_status', 'student_id', 'status'),)
+    
     def __repr__(self):
         return f'<IncidentReport {self.incident_type} Severity:{self.severity}>'
 
@@ -0,0 +1,399 @@
+// Flash messages fade out after a few seconds
+setTimeout(function() {
+    const container = document.getElementById('flashContainer');
+    if (container) {
+        container.style.opacity = '0';
+        container.style.transform = 'translateX(20px)';
+        container.style.transition = 'all 0.3s ease';
+        setTimeout(() => container.remove(), 300);
+    }
+}, 4000);
+
+const mobileMenuBtn = document.getElementById('mobileMenuBtn');
+const mobileMenu = document.getElementById('mobileMenu');
+
+if (mobileMenuBtn && mobileMenu) {
+    mobileMenuBtn.addEventListener('click', () => {
+        mobileMenu.classList.toggle('hidden');
+    });
+}
+
+// Dark Mode Toggle
+const darkModeToggle = document.getElementById('darkModeToggle');
+const htmlRoot = document.documentElement;
+
+if (darkModeToggle) {
+    darkModeToggle.addEventListener('click', () => {
+        const isDark = htmlRoot.classList.toggle('dark');
+        localStorage.setItem('darkMode', isDark);
+    });
+}
+
+// Language Toggle
+const langSelect = document.getElementById('language-select');
+const langSelectGuest = document.getElementById('language-select-guest');
+
+const baseTranslations = {
+    en: {
+        nav_dashboard: 'Dashboard',
+        nav_courses: 'Courses',
+        nav_library: 'E-Library',
+        nav_news: 'News',
+        nav_account: 'Account',
+        nav_account_settings: 'Account Settings',
+        nav_manage: 'Manage',
+        nav_my_courses: 'My Courses',
+        nav_manage_news: 'Manage News',
+        nav_edit_clinical: 'Edit Clinical Module',
+        nav_clinical_docs: 'Clinical Docs',
+        nav_library_approvals: 'Library Approvals',
+        nav_manage_users: 'Manage Users',
+        nav_performance: 'Performance',
+        nav_logout: 'Logout',
+        nav_login: 'Login',
+        nav_get_started: 'Get Started',
+        lang_english: 'English',
+        lang_indonesian: 'Indonesia',
+        footer_tagline: 'Hospital E-Learning & Management System for modern healthcare education.',
+        footer_quick_links: 'Quick Links',
+        footer_courses: 'Courses',
+        footer_library: 'E-Library',
+        footer_support: 'Support',
+        footer_help_center: 'Help Center',
+        footer_contact_us: 'Contact Us',
+        footer_legal: 'Legal',
+        footer_privacy: 'Privacy Policy',
+        footer_terms: 'Terms of Service',
+        footer_copyright: '© 2026 IT Diklat RSSR. Seluruh hak cipta.'
+    },
+    id: {
+        nav_dashboard: 'Dasbor',
+        nav_courses: 'Kursus',
+        nav_library: 'E-Perpustakaan',
+        nav_news: 'Berita',
+        nav_account: 'Akun',
+        nav_account_settings: 'Pengaturan Akun',
+        nav_manage: 'Kelola',
+        nav_my_courses: 'Kursus Saya',
+        nav_manage_news: 'Kelola Berita',
+        nav_edit_clinical: 'Kelola Modul Klinik',
+        nav_clinical_docs: 'Dokumen Klinik',
+        nav_library_approvals: 'Persetujuan Perpustakaan',
+        nav_manage_users: 'Kelola Pengguna',
+        nav_performance: 'Kinerja',
+        nav_logout: 'Keluar',
+        nav_login: 'Masuk',
+        nav_get_started: 'Mulai',
+        lang_english: 'Inggris',
+        lang_indonesian: 'Indonesia',
+        footer_tagline: 'Sistem E-Learning & Manajemen Rumah Sakit untuk pendidikan kesehatan modern.',
+        footer_quick_links: 'Tautan Cepat',
+        footer_courses: 'Kursus',
+        footer_library: 'E-Perpustakaan',
+        footer_support: 'Dukungan',
+        footer_help_center: 'Pusat Bantuan',
+        footer_contact_us: 'Hubungi Kami',
+        footer_legal: 'Hukum',
+        footer_privacy: 'Kebijakan Privasi',
+        footer_terms: 'Syarat Layanan',
+        footer_copyright: '© 2026 IT Diklat RSSR. Seluruh hak cipta.'
+    }
+};
+
+const textTranslations = {
+    id: {
+        'Welcome back': 'Selamat datang kembali',
+        'Latest News': 'Berita Terbaru',
+        'View All': 'Lihat Semua',
+        'Enrolled Courses': 'Kursus Terdaftar',
+        'Active enrollments': 'Pendaftaran aktif',
+        'Available Courses': 'Kursus Tersedia',
+        'Ready to explore': 'Siap dijelajahi',
+        'Division': 'Divisi',
+        'Not set': 'Belum diatur',
+        'Admin Account': 'Akun Admin',
+        'Continue Learning': 'Lanjut Belajar',
+        'Browse Courses': 'Jelajahi Kursus',
+        'Explore E-Library': 'Jelajahi E-Perpustakaan',
+        'Visit Library': 'Kunjungi Perpustakaan',
+        'Clinical Practice': 'Praktik Klinik',
+        'Pre-Clinical': 'Pra-Klinik',
+        'In Progress': 'Sedang Berjalan',
+        'View Status': 'Lihat Status',
+        'Digital Logbook': 'Logbook Digital',
+        'Dashboard': 'Dasbor',
+        'Courses': 'Kursus',
+        'E-Library': 'E-Perpustakaan',
+        'News': 'Berita',
+        'Account': 'Akun',
+        'Account Settings': 'Pengaturan Akun',
+        'Manage': 'Kelola',
+        'My Courses': 'Kursus Saya',
+        'Manage News': 'Kelola Berita',
+        'Library Approvals': 'Persetujuan Perpustakaan',
+        'Manage Users': 'Kelola Pengguna',
+        'Logout': 'Keluar',
+        'Login': 'Masuk',
+        'Get Started': 'Mulai',
+        'Quick Links': 'Tautan Cepat',
+        'Support': 'Dukungan',
+        'Help Center': 'Pusat Bantuan',
+        'Contact Us': 'Hubungi Kami',
+        'Legal': 'Hukum',
+        'Privacy Policy': 'Kebijakan Privasi',
+        'Terms of Service': 'Syarat Layanan',
+        'Course Catalog': 'Katalog Kursus',
+        'Search Courses': 'Cari Kursus',
+        'Category': 'Kategori',
+        'All Categories': 'Semua Kategori',
+        'Administration': 'Administrasi',
+        'Reset Filters': 'Atur Ulang Filter',
+        'Start Learning': 'Mulai Belajar',
+        'Previous': 'Sebelumnya',
+        'Next': 'Berikutnya',
+        'No courses found': 'Tidak ada kursus ditemukan',
+        'Try adjusting your search filters or check back soon.': 'Coba sesuaikan filter pencarian atau periksa kembali nanti.',
+        'E-Learning Modules': 'Modul E-Learning',
+        'Back to Onboarding': 'Kembali ke Orientasi',
+        'Sign Agreement': 'Tandatangani Perjanjian',
+        'Back': 'Kembali',
+        'Profile Picture': 'Foto Profil',
+        'Profile Information': 'Informasi Profil',
+        'Save Changes': 'Simpan Perubahan',
+        'Change Password': 'Ubah Kata Sandi',
+        'Current Password': 'Kata Sandi Saat Ini',
+        'New Password': 'Kata Sandi Baru',
+        'Confirm New Password': 'Konfirmasi Kata Sandi Baru',
+        'Update Password': 'Perbarui Kata Sandi',
+        'Role Requests': 'Permintaan Peran',
+        'Approved': 'Disetujui',
+        'Pending Approval': 'Menunggu Persetujuan',
+        'Apply': 'Ajukan',
+        'Enter your username': 'Masukkan nama pengguna',
+        'Enter your password': 'Masukkan kata sandi',
+        'Choose a username': 'Pilih nama pengguna',
+        'Email Address': 'Alamat Email',
+        'your@hospital.com': 'your@hospital.com',
+        'Division/Department': 'Divisi/Departemen',
+        'Create a strong password': 'Buat kata sandi yang kuat',
+        'Search by title or description...': 'Cari berdasarkan judul atau deskripsi...',
+        'Create Account': 'Buat Akun',
+        'Sign In': 'Masuk',
+        "Don't have an account?": 'Belum punya akun?',
+        'Already have an account?': 'Sudah punya akun?',
+        'Register': 'Daftar',
+        'Profile Picture': 'Foto Profil',
+        'Profile Information': 'Informasi Profil',
+        'Save Changes': 'Simpan Perubahan',
+        'Change Password': 'Ubah Kata Sandi',
+        'Update Password': 'Perbarui Kata Sandi',
+        'Role Requests': 'Permintaan Peran',
+        'Edit Clinical Module': 'Kelola Modul Klinik',
+        'Approve Clinical Docs': 'Setujui Dokumen Klinik',
+        'Clinical Docs': 'Dokumen Klinik',
+        'Admin: Clinical Module': 'Admin: Modul Klinik',
+        'Approve Clinical Docs': 'Setujui Dokumen Klinik'
+    },
+    en: {
+        'Selamat datang kembali': 'Welcome back',
+        'Berita Terbaru': 'Latest News',
+        'Lihat Semua': 'View All',
+        'Kursus Terdaftar': 'Enrolled Courses',
+        'Pendaftaran aktif': 'Active enrollments',
+        'Kursus Tersedia': 'Available Courses',
+        'Siap dijelajahi': 'Ready to explore',
+        'Divisi': 'Division',
+        'Belum diatur': 'Not set',
+        'Akun Admin': 'Admin Account',
+        'Lanjut Belajar': 'Continue Learning',
+        'Jelajahi Kursus': 'Browse Courses',
+        'Jelajahi E-Perpustakaan': 'Explore E-Library',
+        'Kunjungi Perpustakaan': 'Visit Library',
+        'Praktik Klinik': 'Clinical Practice',
+        'Pra-Klinik': 'Pre-Clinical',
+        'Sedang Berjalan': 'In Progress',
+        'Lihat Status': 'View Status',
+        'Logbook Digital': 'Digital Logbook',
+        'Dasbor': 'Dashboard',
+        'Kursus': 'Courses',
+        'E-Perpustakaan': 'E-Library',
+        'Berita': 'News',
+        'Akun': 'Account',
+        'Pengaturan Akun': 'Account Settings',
+        'Kelola': 'Manage',
+        'Kursus Saya': 'My Courses',
+        'Kelola Berita': 'Manage News',
+        'Persetujuan Perpustakaan': 'Library Approvals',
+        'Kelola Pengguna': 'Manage Users',
+        'Keluar': 'Logout',
+        'Masuk': 'Login',
+        'Mulai': 'Get Started',
+        'Tautan Cepat': 'Quick Links',
+        'Dukungan': 'Support',
+        'Pusat Bantuan': 'Help Center',
+        'Hubungi Kami': 'Contact Us',
+        'Hukum': 'Legal',
+        'Kebijakan Privasi': 'Privacy Policy',
+        'Syarat Layanan': 'Terms of Service',
+        'Katalog Kursus': 'Course Catalog',
+        'Cari Kursus': 'Search Courses',
+        'Kategori': 'Category',
+        'Semua Kategori': 'All Categories',
+        'Administrasi': 'Administration',
+        'Atur Ulang Filter': 'Reset Filters',
+        'Mulai Belajar': 'Start Learning',
+        'Sebelumnya': 'Previous',
+        'Berikutnya': 'Next',
+        'Tidak ada kursus ditemukan': 'No courses found',
+        'Coba sesuaikan filter pencarian atau periksa kembali nanti.': 'Try adjusting your search filters or check back soon.',
+        'Modul E-Learning': 'E-Learning Modules',
+        'Kembali ke Orientasi': 'Back to Onboarding',
+        'Tandatangani Perjanjian': 'Sign Agreement',
+        'Kembali': 'Back',
+        'Foto Profil': 'Profile Picture',
+        'Informasi Profil': 'Profile Information',
+        'Simpan Perubahan': 'Save Changes',
+        'Ubah Kata Sandi': 'Change Password',
+        'Kata Sandi Saat Ini': 'Current Password',
+        'Kata Sandi Baru': 'New Password',
+        'Konfirmasi Kata Sandi Baru': 'Confirm New Password',
+        'Perbarui Kata Sandi': 'Update Password',
+        'Permintaan Peran': 'Role Requests',
+        'Disetujui': 'Approved',
+        'Menunggu Persetujuan': 'Pending Approval',
+        'Ajukan': 'Apply',
+        'Masukkan nama pengguna': 'Enter your username',
+        'Masukkan kata sandi': 'Enter your password',
+        'Pilih nama pengguna': 'Choose a username',
+        'Alamat Email': 'Email Address',
+        'Divisi/Departemen': 'Division/Department',
+        'Buat kata sandi yang kuat': 'Create a strong password',
+        'Cari berdasarkan judul atau deskripsi...': 'Search by title or description...',
+        'Buat Akun': 'Create Account',
+        'Belum punya akun?': "Don't have an account?",
+        'Sudah punya akun?': 'Already have an account?',
+        'Daftar': 'Register',
+        'Foto Profil': 'Profile Picture',
+        'Informasi Profil': 'Profile Information',
+        'Simpan Perubahan': 'Save Changes',
+        'Ubah Kata Sandi': 'Change Password',
+        'Perbarui Kata Sandi': 'Update Password',
+        'Permintaan Peran': 'Role Requests',
+        'Kelola Modul Klinik': 'Edit Clinical Module',
+        'Setujui Dokumen Klinik': 'Approve Clinical Docs',
+        'Dokumen Klinik': 'Clinical Docs',
+        'Admin: Modul Klinik': 'Admin: Clinical Module',
+        'Setujui Dokumen Klinik': 'Approve Clinical Docs'
+    }
+};
+
+const translateTextNodes = (lang) => {
+    const dict = textTranslations[lang] || {};
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT, {
+        acceptNode: (node) => {
+            const text = node.nodeValue.trim();
+            if (!text) return NodeFilter.FILTER_REJECT;
+            const parent = node.parentElement;
+            if (!parent) return NodeFilter.FILTER_REJECT;
+            if (parent.closest('[data-i18n],[data-i18n-html]')) return NodeFilter.FILTER_REJECT;
+            if (['SCRIPT', 'STYLE', 'NOSCRIPT', 'CODE', 'PRE', 'TEXTAREA'].includes(parent.tagName)) {
+                return NodeFilter.FILTER_REJECT;
+            }
+            return dict[text] ? NodeFilter.FILTER_ACCEPT : NodeFilter.FILTER_REJECT;
+        }
+    });
+    const nodes = [];
+    while (walker.nextNode()) nodes.push(walker.currentNode);
+    nodes.forEach((node) => {
+        const text = node.nodeValue.trim();
+        if (dict[text]) node.nodeValue = node.nodeValue.replace(text, dict[text]);
+    });
+};
+
+const applyTranslations = (lang) => {
+    const dict = {
+        en: { ...baseTranslations.en, ...(window.PAGE_TRANSLATIONS?.en || {}) },
+        id: { ...baseTranslations.id, ...(window.PAGE_TRANSLATIONS?.id || {}) }
+    };
+    const active = dict[lang] ? lang : 'en';
+    document.documentElement.setAttribute('lang', active);
+
+    document.querySelectorAll('[data-i18n]').forEach((el) => {
+        const key = el.getAttribute('data-i18n');
+        const value = dict[active][key];
+        if (value) el.textContent = value;
+    });
+
+    document.querySelectorAll('[data-i18n-placeholder]').forEach((el) => {
+        const key = el.getAttribute('data-i18n-placeholder');
+        const value = dict[active][key];
+        if (value) el.setAttribute('placeholder', value);
+    });
+
+    document.querySelectorAll('[data-i18n-title]').forEach((el) => {
+        const key = el.getAttribute('data-i18n-title');
+        const value = dict[active][key];
+        if (value) el.setAttribute('title', value);
+    });
+
+    document.querySelectorAll('[data-i18n-html]').forEach((el) => {
+        const key = el.getAttribute('data-i18n-html');
+        const value = dict[active][key];
+        if (value) el.innerHTML = value;
+    });
+
+    document.querySelectorAll('[placeholder]').forEach((el) => {
+        const placeholder = el.getAttribute('placeholder');
+        const value = textTranslations[active]?.[placeholder];
+        if (value) el.setAttribute('placeholder', value);
+    });
+
+    translateTextNodes(active);
+};
+
+const storedLang = localStorage.getItem('language') || 'en';
+if (langSelect) langSelect.value = storedLang;
+if (langSelectGuest) langSelectGuest.value = storedLang;
+applyTranslations(storedLang);
+
+const onLangChange = (e) => {
+    const lang = e.target.value;
+    localStorage.setItem('language', lang);
+    applyTranslations(lang);
+    if (langSelect && langSelect !== e.target) langSelect.value = lang;
+    if (langSelectGuest && langSelectGuest !== e.target) langSelectGuest.value = lang;
+};
+
+if (langSelect) langSelect.addEventListener('change', onLangChange);
+if (langSelectGuest) langSelectGuest.addEventListener('change', onLangChange);
+
+// Admin Dropdown Toggle
+function toggleAdminDropdown() {
+    const menu = document.getElementById('adminDropdownMenu');
+    const icon = document.getElementById('adminDropdownIcon');
+    menu.classList.toggle('hidden');
+    if (icon) {
+        icon.style.transform = menu.classList.contains('hidden') ? 'rotate(0deg)' : 'rotate(180deg)';
+    }
+}
+
+// Mobile Admin Dropdown Toggle
+function toggleMobileAdminDropdown() {
+    const menu = document.getElementById('mobileAdminDropdownMenu');
+    const icon = document.getElementById('mobileAdminDropdownIcon');
+    menu.classList.toggle('hidden');
+    if (icon) {
+        icon.style.transform = menu.classList.contains('hidden') ? 'rotate(0deg)' : 'rotate(180deg)';
+    }
+}
+
+// Close dropdown when clicking outside
+document.addEventListener('click', function(event) {
+    const dropdown = document.getElementById('adminDropdown');
+    const menu = document.getElementById('adminDropdownMenu');
+    if (dropdown && menu && !dropdown.contains(event.target)) {
+        menu.classList.add('hidden');
+        const icon = document.getElementById('adminDropdownIcon');
+        if (icon) icon.style.transform = 'rotate(0deg)';
+    }
+});
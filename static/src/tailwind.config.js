@@ -0,0 +1,56 @@
+// Shared by `flask assets-build` (Tailwind CLI) and the in-browser fallback used
+// before the bundles are built.
+const elearyTailwindConfig = {
+    // Paths are relative to this file; only classes found here end up in the bundle
+    content: {
+        relative: true,
+        files: ['../../templates/**/*.html', './**/*.js'],
+    },
+    darkMode: 'class',
+    theme: {
+        extend: {
+            fontFamily: {
+                sans: ['Inter', 'system-ui', 'sans-serif'],
+            },
+            animation: {
+                'fade-in': 'fadeIn 0.5s ease-out',
+                'slide-up': 'slideUp 0.5s ease-out',
+                'slide-down': 'slideDown 0.3s ease-out',
+                'scale-in': 'scaleIn 0.3s ease-out',
+                'pulse-slow': 'pulse 3s infinite',
+                'float': 'float 6s ease-in-out infinite',
+            },
+            keyframes: {
+                fadeIn: {
+                    '0%': { opacity: '0' },
+                    '100%': { opacity: '1' },
+                },
+                slideUp: {
+                    '0%': { opacity: '0', transform: 'translateY(20px)' },
+                    '100%': { opacity: '1', transform: 'translateY(0)' },
+                },
+                slideDown: {
+                    '0%': { opacity: '0', transform: 'translateY(-10px)' },
+                    '100%': { opacity: '1', transform: 'translateY(0)' },
+                },
+                scaleIn: {
+                    '0%': { opacity: '0', transform: 'scale(0.95)' },
+                    '100%': { opacity: '1', transform: 'scale(1)' },
+                },
+                float: {
+                    '0%, 100%': { transform: 'translateY(0)' },
+                    '50%': { transform: 'translateY(-10px)' },
+                },
+            },
+            backdropBlur: {
+                xs: '2px',
+            },
+        }
+    }
+};
+
+if (typeof module !== 'undefined') {
+    module.exports = elearyTailwindConfig;
+} else {
+    tailwind.config = elearyTailwindConfig;
+}
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import pytest
+
+# The app reads DATABASE_URL when it is created. Unset, the tests get a SQLite
+# file of their own; a DATABASE_URL that is set (e.g. PostgreSQL, for
+# test_postgresql.py) must name a throwaway database: every test empties it.
+_tmpdir = tempfile.mkdtemp(prefix='eleary-tests-')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(_tmpdir, 'test.db'))
+os.environ.setdefault('PERF_SAMPLE_RATE', '0')
+
+from app import create_app  # noqa: E402
+from app.search import init_search_index  # noqa: E402
+from models import db, User, Course, CourseModule, CourseMaterial  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    # Indexes that need the tables, which did not exist when the app was created
+    init_search_index(app)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    shutil.rmtree(_tmpdir, ignore_errors=True)
+
+
+@pytest.fixture
+def ctx(app):
+    """An app context over an empty database."""
+    with app.app_context():
+        yield app
+        db.session.rollback()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+        db.session.remove()
+
+
+def make_user(username, role='user'):
+    user = User(username=username, email=f'{username}@example.com', role=role)
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_course(instructor, title='Course', modules=0, materials=0):
+    """A course with the given number of modules, each with materials materials."""
+    course = Course(title=title, instructor_id=instructor.id)
+    db.session.add(course)
+    for m in range(modules):
+        module = CourseModule(course=course, title=f'Module {m + 1}', order_index=m)
+        db.session.add(module)
+        for n in range(materials):
+            db.session.add(CourseMaterial(module=module, title=f'Material {n + 1}'))
+    db.session.commit()
+    return course
@@ -0,0 +1,101 @@
+import pytest
+from models import db, AttendanceLog
+from app.checkin import CheckinBuffer
+from tests.conftest import make_user, make_course
+
+
+class FlakyWrites:
+    """Stands in for CheckinBuffer._write, failing any write that includes a poisoned user."""
+
+    def __init__(self, write, poisoned=()):
+        self.write = write
+        self.poisoned = set(poisoned)
+        self.calls = []
+
+    def __call__(self, rows):
+        self.calls.append([row['user_id'] for row in rows])
+        if any(row['user_id'] in self.poisoned for row in rows):
+            raise RuntimeError('write failed')
+        self.write(rows)
+
+
+@pytest.fixture
+def buffer(ctx):
+    buffer = CheckinBuffer()
+    # Flushed by hand: no background thread
+    buffer._app = ctx
+    buffer._thread = object()
+    return buffer
+
+
+@pytest.fixture
+def course(ctx):
+    return make_course(make_user('instructor', role='pemateri'))
+
+
+def _logged_users():
+    return sorted(user_id for (user_id,) in db.session.query(AttendanceLog.user_id))
+
+
+def test_flush_writes_buffered_rows_once(buffer, course):
+    users = [make_user(f'student{n}') for n in range(3)]
+    for user in users:
+        buffer.add(user.id, course.id)
+    buffer.add(users[0].id, course.id)
+
+    assert buffer.contains(users[0].id, course.id)
+    assert buffer.flush() == 3
+    assert buffer.flush() == 0
+    assert _logged_users() == sorted(user.id for user in users)
+    assert not buffer.contains(users[0].id, course.id)
+
+
+def test_failed_batch_is_retried_row_by_row(buffer, course):
+    good, bad = make_user('good'), make_user('bad')
+    buffer._write = writes = FlakyWrites(buffer._write, poisoned={bad.id})
+    buffer.add(good.id, course.id)
+    buffer.add(bad.id, course.id)
+
+    assert buffer.flush() == 1
+    assert writes.calls == [[good.id, bad.id], [good.id], [bad.id]]
+    assert _logged_users() == [good.id]
+    # The failed row stays buffered for the next flush, and still counts as checked in
+    assert buffer.contains(bad.id, course.id)
+    assert not buffer.contains(good.id, course.id)
+    assert buffer._failing == 1
+
+
+def test_requeued_row_is_written_once_the_failure_clears(buffer, course):
+    user = make_user('student')
+    buffer._write = writes = FlakyWrites(buffer._write, poisoned={user.id})
+    buffer.add(user.id, course.id)
+
+    assert buffer.flush() == 0
+    writes.poisoned.clear()
+    assert buffer.flush() == 1
+    assert _logged_users() == [user.id]
+    assert buffer._attempts == {}
+    assert buffer._failing == 0
+
+
+def test_row_is_dropped_after_max_attempts(buffer, course, caplog):
+    buffer._app.config['CHECKIN_MAX_ATTEMPTS'] = 3
+    good, bad = make_user('good'), make_user('bad')
+    buffer._write = FlakyWrites(buffer._write, poisoned={bad.id})
+    buffer.add(bad.id, course.id)
+
+    try:
+        for attempt in range(3):
+            assert buffer.contains(bad.id, course.id)
+            buffer.flush()
+    finally:
+        buffer._app.config['CHECKIN_MAX_ATTEMPTS'] = 5
+
+    assert not buffer.contains(bad.id, course.id)
+    assert buffer._rows == [] and buffer._attempts == {}
+    assert 'Dropping check-in after 3 failed attempts' in caplog.text
+
+    # Later check-ins are unaffected
+    buffer.add(good.id, course.id)
+    assert buffer.flush() == 1
+    assert _logged_users() == [good.id]
@@ -0,0 +1,93 @@
+import pytest
+from models import db, Course, CourseModule, CourseMaterial, CourseEnrollment, MaterialComment
+from app.counters import verify_counters
+from tests.conftest import make_user, make_course
+
+
+@pytest.fixture
+def instructor(ctx):
+    return make_user('instructor', role='pemateri')
+
+
+def _counts(model, column):
+    return dict(db.session.query(model.id, getattr(model, column)).order_by(model.id).all())
+
+
+def test_counters_follow_inserts_and_deletes(instructor):
+    course = make_course(instructor, modules=2, materials=3)
+    assert course.module_count == 2
+    assert set(_counts(CourseModule, 'material_count').values()) == {3}
+
+    module = course.modules.first()
+    db.session.delete(module.materials.first())
+    db.session.commit()
+    assert module.material_count == 2
+
+    db.session.delete(module)
+    db.session.commit()
+    assert course.module_count == 1
+    assert verify_counters() == []
+
+
+def test_moving_a_child_moves_its_count(instructor):
+    first = make_course(instructor, title='First', modules=2)
+    second = make_course(instructor, title='Second')
+    module = first.modules.first()
+
+    module.course_id = second.id
+    db.session.commit()
+
+    assert (first.module_count, second.module_count) == (1, 1)
+    assert verify_counters() == []
+
+
+def test_moving_an_expired_child_moves_its_count(instructor):
+    first = make_course(instructor, title='First', modules=1, materials=1)
+    second = make_course(instructor, title='Second', modules=1)
+    source, target = first.modules.first(), second.modules.first()
+    material = source.materials.first()
+    material_id, source_id, target_id = material.id, source.id, target.id
+    db.session.expire_all()
+
+    # The old parent id is loaded before the assignment replaces it
+    db.session.get(CourseMaterial, material_id).module_id = target_id
+    db.session.commit()
+
+    counts = _counts(CourseModule, 'material_count')
+    assert (counts[source_id], counts[target_id]) == (0, 1)
+    assert verify_counters() == []
+
+
+def test_counter_writes_do_not_touch_parent_updated_at(instructor):
+    course = make_course(instructor)
+    updated_at = course.updated_at
+
+    db.session.add(CourseEnrollment(user_id=make_user('student').id, course_id=course.id))
+    db.session.commit()
+
+    assert course.enrollment_count == 1
+    assert course.updated_at == updated_at
+
+
+def test_verify_counters_reports_and_repairs_drift(instructor):
+    course = make_course(instructor, modules=2)
+    material = CourseMaterial(module=course.modules.first(), title='Material')
+    db.session.add(material)
+    db.session.add(MaterialComment(material=material, user_id=instructor.id, content='Hi'))
+    db.session.commit()
+
+    # Bulk deletes bypass the ORM events that keep the counters
+    CourseModule.query.filter(CourseModule.id != material.module_id).delete()
+    MaterialComment.query.delete()
+    db.session.commit()
+
+    drift = sorted(verify_counters())
+    assert drift == sorted([
+        ('course', 'module_count', course.id, 2, 1),
+        ('course_material', 'comment_count', material.id, 1, 0),
+    ])
+
+    assert sorted(verify_counters(repair=True)) == drift
+    assert verify_counters() == []
+    db.session.expire_all()
+    assert db.session.get(Course, course.id).module_count == 1
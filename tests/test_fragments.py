@@ -0,0 +1,103 @@
+import pytest
+from models import db, CourseModule, CourseMaterial
+from app.cache import MemoryCache
+from app.fragments import fragment_cache
+from tests.conftest import make_user, make_course
+
+
+class Renders:
+    """Render callback that counts how often the fragment was actually rendered."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        return f'<p>render {self.count}</p>'
+
+
+@pytest.fixture
+def cache(ctx):
+    backend = fragment_cache.backend
+    fragment_cache.configure(MemoryCache())
+    yield fragment_cache
+    fragment_cache.configure(backend)
+
+
+@pytest.fixture
+def course(ctx):
+    return make_course(make_user('instructor', role='pemateri'), modules=1, materials=1)
+
+
+def _fetch(cache, course, render):
+    return cache.fetch(('course_card', course.id), [f'course:{course.id}'], render)
+
+
+def test_fragment_is_reused_until_a_dependency_changes(cache, course):
+    render = Renders()
+    assert _fetch(cache, course, render) == '<p>render 1</p>'
+    assert _fetch(cache, course, render) == '<p>render 1</p>'
+    assert render.count == 1
+
+
+def test_commit_invalidates_dependent_fragments(cache, course):
+    render, other = Renders(), Renders()
+    _fetch(cache, course, render)
+    cache.fetch('news_list', ['news'], other)
+
+    course.title = 'Renamed'
+    db.session.commit()
+
+    assert _fetch(cache, course, render) == '<p>render 2</p>'
+    cache.fetch('news_list', ['news'], other)
+    assert other.count == 1
+
+
+def test_flush_alone_does_not_invalidate(cache, course):
+    render = Renders()
+    _fetch(cache, course, render)
+
+    course.title = 'Renamed'
+    db.session.flush()
+    _fetch(cache, course, render)
+    assert render.count == 1
+
+    db.session.commit()
+    _fetch(cache, course, render)
+    assert render.count == 2
+
+
+def test_rollback_keeps_cached_fragments(cache, course):
+    render = Renders()
+    _fetch(cache, course, render)
+
+    course.title = 'Renamed'
+    db.session.flush()
+    db.session.rollback()
+    _fetch(cache, course, render)
+    assert render.count == 1
+
+    # Tags collected before the rollback are not applied by a later, unrelated commit
+    make_user('someone')
+    _fetch(cache, course, render)
+    assert render.count == 1
+
+
+def test_child_changes_invalidate_their_parent(cache, course):
+    render = Renders()
+    module = CourseModule.query.filter_by(course_id=course.id).one()
+    module_render = Renders()
+    _fetch(cache, course, render)
+    cache.fetch(('module', module.id), [f'course_module:{module.id}'], module_render)
+
+    db.session.add(CourseMaterial(module_id=module.id, title='New material'))
+    db.session.commit()
+
+    cache.fetch(('module', module.id), [f'course_module:{module.id}'], module_render)
+    assert module_render.count == 2
+
+    db.session.delete(module)
+    db.session.commit()
+
+    _fetch(cache, course, render)
+    assert render.count == 2
@@ -0,0 +1,93 @@
+import threading
+import time
+import pytest
+from models import db
+from app.sqlite import WriteQueue, WriteQueueTimeout, write_slot
+from tests.conftest import make_user
+
+
+def _wait_for_waiters(queue, count):
+    deadline = time.monotonic() + 5
+    while len(queue._waiters) < count:
+        assert time.monotonic() < deadline, 'writers did not queue up'
+        time.sleep(0.001)
+
+
+def test_writers_get_their_turn_in_arrival_order():
+    queue = WriteQueue()
+    order = []
+
+    def writer(n):
+        assert queue.acquire(timeout=5)
+        order.append(n)
+        queue.release()
+
+    assert queue.acquire()
+    threads = []
+    for n in range(5):
+        thread = threading.Thread(target=writer, args=(n,))
+        thread.start()
+        threads.append(thread)
+        # One at a time, so arrival order is known
+        _wait_for_waiters(queue, n + 2)
+    queue.release()
+    for thread in threads:
+        thread.join(5)
+
+    assert order == [0, 1, 2, 3, 4]
+    assert not queue._waiters
+
+
+def test_timed_out_writer_leaves_the_queue():
+    queue = WriteQueue()
+    assert queue.acquire()
+    assert queue.acquire(timeout=0.01) is False
+    assert len(queue._waiters) == 1
+
+    # The holder's release goes to the next writer, not to the one that gave up
+    acquired = []
+    thread = threading.Thread(target=lambda: acquired.append(queue.acquire(timeout=5)))
+    thread.start()
+    _wait_for_waiters(queue, 2)
+    queue.release()
+    thread.join(5)
+    assert acquired == [True]
+    queue.release()
+    assert not queue._waiters
+
+
+@pytest.fixture
+def write_queue(ctx):
+    queue = ctx.extensions.get('sqlite_write_queue')
+    if queue is None:
+        pytest.skip('write queue is only used on SQLite')
+    return queue
+
+
+def test_write_slot_times_out_while_another_writer_holds_the_turn(ctx, write_queue):
+    ctx.config['SQLITE_WRITE_TIMEOUT'] = 0.01
+    assert write_queue.acquire()
+    try:
+        with pytest.raises(WriteQueueTimeout):
+            with write_slot():
+                pass
+    finally:
+        write_queue.release()
+        ctx.config['SQLITE_WRITE_TIMEOUT'] = 10
+    assert not write_queue._waiters
+
+
+def test_session_holds_the_turn_until_commit_or_rollback(ctx, write_queue):
+    user = make_user('student')
+
+    user.bio = 'Changed'
+    db.session.flush()
+    assert len(write_queue._waiters) == 1
+    db.session.commit()
+    assert not write_queue._waiters
+
+    user.bio = 'Changed again'
+    db.session.flush()
+    assert len(write_queue._waiters) == 1
+    db.session.rollback()
+    assert not write_queue._waiters